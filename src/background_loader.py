@@ -0,0 +1,50 @@
+import threading
+import time
+from typing import Any, Callable, Optional
+
+
+class BackgroundLoader:
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        background: bool = True,
+        name: str = "background-loader"
+    ):
+        self._factory = factory
+        self._result: Any = None
+        self._error: Optional[BaseException] = None
+        self._done = threading.Event()
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+
+        if background:
+            self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+            self._thread.start()
+        else:
+            self._thread = None
+            self._run()
+
+    def _run(self):
+        try:
+            self._result = self._factory()
+        except BaseException as error:
+            self._error = error
+        finally:
+            self.finished_at = time.perf_counter()
+            self._done.set()
+
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        if not self._done.wait(timeout):
+            raise TimeoutError("Background load did not finish in time")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    @property
+    def load_seconds(self) -> Optional[float]:
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
@@ -1,5 +1,7 @@
 import csv
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+import config
 
 from session_controller import SessionController
 from query_interpreter import QueryInterpreter
@@ -8,12 +10,29 @@ from response_generator import ResponseGenerator
 from reasoning_engine import CausalReasoningEngine
 from causal_aggregator import aggregate_causal_explanations
 from final_explainer import FinalCausalExplainer
+from outcome_validator import OutcomeValidator
 class EscalationCausalSystem:
     def __init__(self):
         self.engine = CausalReasoningEngine()
         self.explainer = FinalCausalExplainer()
+        self.validator = OutcomeValidator(self.engine.support_table)
 
-    def run(self, query: str) -> Dict:
+    def explain(self, reasoning_output: Dict) -> Dict:
+        explanation = self.explainer.generate_explanation(reasoning_output)
+        validation = self.validator.validate(
+            query=reasoning_output["query"],
+            outcome=reasoning_output["outcome"],
+            step6_output=reasoning_output
+        )
+        explanation["outcome_validation"] = validation
+        if (
+            explanation.get("escalation_confirmed")
+            and not validation["outcome_confirmed"]
+        ):
+            explanation["confidence"] = "MEDIUM"
+        return explanation
+
+    def analyze(self, query: str) -> Dict:
         reasoning_output = self.engine.answer_query(
             query=query,
             outcome="ESCALATION",
@@ -25,8 +44,10 @@ class EscalationCausalSystem:
                 reasoning_output.get("supporting_calls", [])
             )
         )
+        return reasoning_output
 
-        return self.explainer.generate_explanation(reasoning_output)
+    def run(self, query: str) -> Dict:
+        return self.explain(self.analyze(query))
 
 QUERIES: List[Dict] = [
     {"id": "Q1", "query": "Why did the customer ask for a supervisor multiple times?", "category": "Escalation Reason"},
@@ -40,51 +61,77 @@ QUERIES: List[Dict] = [
     {"id": "Q9", "query": "Did the customer threaten to cancel the service?", "category": "Churn Risk"},
     {"id": "Q10", "query": "Did policy restrictions prevent resolution?", "category": "Policy Constraint"},
 ]
-def run_batch(output_csv: str = "evaluation_results.csv"):
+def run_batch(
+    output_csv: str = "evaluation_results.csv",
+    columnar_dir: Optional[str] = None,
+    columnar_format: str = None
+):
 
     session_controller = SessionController()
     query_interpreter = QueryInterpreter()
     reasoning_router = ReasoningRouter()
-    response_generator = ResponseGenerator()
     causal_system = EscalationCausalSystem()
+    response_generator = ResponseGenerator(
+        dataset=causal_system.engine.dataset
+    )
 
     rows = []
+    columnar_writer = None
+    if columnar_dir is not None:
+        from result_export import ColumnarResultWriter
 
-    for item in QUERIES:
-        user_query = item["query"]
-        request = session_controller.prepare_request(user_query)
-        interpreted = query_interpreter.interpret(
-            request["current_query"],
-            request["prior_context"]
-        )
-        plan = reasoning_router.route(
-            interpreted,
-            request["prior_context"]
-        )
-        final_query = (
-            plan.get("query")
-            if isinstance(plan, dict) and "query" in plan
-            else interpreted.get("query", user_query)
-            if isinstance(interpreted, dict)
-            else user_query
-        )
-        result = causal_system.run(final_query)
-        output_text = response_generator.generate(
-            reasoning_output=result,
-            session_context=request["prior_context"],
-            user_query=user_query
-        )
-        session_controller.store_result(
-            user_query=user_query,
-            system_result=result
+        columnar_writer = ColumnarResultWriter(
+            columnar_dir,
+            fmt=columnar_format or config.COLUMNAR_FORMAT
         )
-        rows.append([
-            item["id"],
-            user_query,
-            item["category"],
-            output_text.replace("\n", " "),
-            "IDRecall, Faithfulness, Relevancy auto-computed"
-        ])
+
+    try:
+        for item in QUERIES:
+            user_query = item["query"]
+            request = session_controller.prepare_request(user_query)
+            interpreted = query_interpreter.interpret(
+                request["current_query"],
+                request["prior_context"]
+            )
+            plan = reasoning_router.route(
+                interpreted,
+                request["prior_context"]
+            )
+            final_query = (
+                plan.get("query")
+                if isinstance(plan, dict) and "query" in plan
+                else interpreted.get("query", user_query)
+                if isinstance(interpreted, dict)
+                else user_query
+            )
+            reasoning_output = causal_system.analyze(final_query)
+            result = causal_system.explain(reasoning_output)
+            if columnar_writer is not None:
+                columnar_writer.add_result(
+                    query_id=item["id"],
+                    query=user_query,
+                    category=item["category"],
+                    reasoning_output=reasoning_output
+                )
+            output_text = response_generator.generate(
+                reasoning_output=result,
+                session_context=request["prior_context"],
+                user_query=user_query
+            )
+            session_controller.store_result(
+                user_query=user_query,
+                system_result=result
+            )
+            rows.append([
+                item["id"],
+                user_query,
+                item["category"],
+                output_text.replace("\n", " "),
+                "Not scored; see src/evaluation.py for labelled metrics"
+            ])
+    finally:
+        if columnar_writer is not None:
+            columnar_writer.close()
     with open(output_csv, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow([
@@ -97,5 +144,17 @@ def run_batch(output_csv: str = "evaluation_results.csv"):
         writer.writerows(rows)
 
     print(f"\n✅ Batch evaluation completed successfully → {output_csv}\n")
+    if columnar_writer is not None:
+        print(
+            f"Columnar export: {columnar_writer.factors.num_rows} factor rows → "
+            f"{columnar_writer.factor_path}, {columnar_writer.evidence.num_rows} "
+            f"evidence rows → {columnar_writer.evidence_path}"
+        )
+    causal_system.engine.save_caches()
+    print(f"Result cache: {causal_system.engine.result_cache.stats()}")
+    if causal_system.engine.semantic_cache is not None:
+        print(f"Semantic cache: {causal_system.engine.semantic_cache.stats()}")
+    if config.DEADLINE_MS is not None:
+        print(f"Deadline degradations: {causal_system.engine.degradation_metrics.stats()}")
 if __name__ == "__main__":
-    run_batch()
+    run_batch(columnar_dir=config.COLUMNAR_EXPORT_DIR)
@@ -12,11 +12,12 @@ def aggregate_causal_explanations(
 
     for call in supporting_calls:
         causal_exp = call["causal_explanation"]
+        weight = call.get("cluster_size", 1)
 
         for factor in causal_exp["causal_factors"]:
             name = factor["factor"]
-            factor_stats[name]["supporting_calls"] += 1
-            factor_stats[name]["total_score"] += factor["evidence_score"]
+            factor_stats[name]["supporting_calls"] += weight
+            factor_stats[name]["total_score"] += factor["evidence_score"] * weight
 
     aggregated = []
     for factor, stats in factor_stats.items():
@@ -1,7 +1,12 @@
 import re
-from typing import List, Dict
+import json
+import hashlib
+from typing import List, Dict, Optional, Sequence
 from collections import defaultdict
 
+from evidence import evidence_ref
+from text_pipeline import normalize_text, speaker_role
+
 CAUSAL_PATTERNS = {
     "Repeated unresolved issue": [
         r"\balready explained\b",
@@ -35,28 +40,39 @@ CAUSAL_PATTERNS = {
     ]
 }
 
+def pattern_version() -> str:
+    payload = json.dumps(CAUSAL_PATTERNS, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()[:12]
+
 def extract_causal_explanation(
     conversation: List[Dict],
-    outcome: str
+    outcome: str,
+    transcript_id: Optional[str] = None,
+    speaker: Optional[str] = None,
+    normalized_turns: Optional[Sequence[str]] = None
 ) -> Dict:
     factor_to_evidence = defaultdict(list)
     customer_turns = [
         i for i, t in enumerate(conversation)
-        if t["speaker"].lower() == "customer"
+        if speaker_role(t["speaker"]) == "customer"
     ]
     total_customer_turns = max(len(customer_turns), 1)
 
     for turn_id, turn in enumerate(conversation):
-        text = turn["text"].lower()
+        if speaker is not None and speaker_role(turn["speaker"]) != speaker:
+            continue
+        text = (
+            normalized_turns[turn_id] if normalized_turns is not None
+            else normalize_text(turn["text"])
+        )
 
         for factor, patterns in CAUSAL_PATTERNS.items():
             for pattern in patterns:
-                if re.search(pattern, text):
-                    factor_to_evidence[factor].append({
-                        "turn_id": turn_id,
-                        "speaker": turn["speaker"],
-                        "text": turn["text"]
-                    })
+                match = re.search(pattern, text)
+                if match:
+                    factor_to_evidence[factor].append(
+                        evidence_ref(transcript_id, turn_id, match.span())
+                    )
                     break
 
     causal_factors = []
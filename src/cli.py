@@ -1,6 +1,10 @@
-from reasoning_engine import CausalReasoningEngine
+from typing import Dict, Iterator
+
+import config
+from background_loader import BackgroundLoader
 from causal_aggregator import aggregate_causal_explanations
 from final_explainer import FinalCausalExplainer
+from query_log import CacheWarmer
 
 from session_controller import SessionController
 from query_interpreter import QueryInterpreter
@@ -9,34 +13,102 @@ from response_generator import ResponseGenerator
 
 
 class EscalationCausalSystem:
-    def __init__(self):
-        self.reasoning_engine = CausalReasoningEngine()
-        self.explainer = FinalCausalExplainer()
+    def __init__(self, verbose: bool = True):
+        from outcome_validator import OutcomeValidator
+        from reasoning_engine import CausalReasoningEngine
 
-    def run(self, query: str, outcome: str = "ESCALATION", top_k: int = 5):
-        reasoning_output = self.reasoning_engine.answer_query(
-            query=query,
-            outcome=outcome,
-            top_k=top_k
+        self.reasoning_engine = CausalReasoningEngine(verbose=verbose)
+        self.explainer = FinalCausalExplainer()
+        self.validator = OutcomeValidator(self.reasoning_engine.support_table)
+        self.warmer = (
+            CacheWarmer(self.reasoning_engine) if config.QUERY_LOG_ENABLED else None
         )
 
-        global_causal_explanation = aggregate_causal_explanations(
-            supporting_calls=reasoning_output["supporting_calls"]
+    def explain(self, reasoning_output: Dict) -> Dict:
+        explanation = self.explainer.generate_explanation(reasoning_output)
+        validation = self.validator.validate(
+            query=reasoning_output["query"],
+            outcome=reasoning_output["outcome"],
+            step6_output=reasoning_output
         )
+        explanation["outcome_validation"] = validation
+        if (
+            explanation.get("escalation_confirmed")
+            and not validation["outcome_confirmed"]
+        ):
+            explanation["confidence"] = "MEDIUM"
+        return explanation
 
-        reasoning_output["global_causal_explanation"] = global_causal_explanation
-        return self.explainer.generate_explanation(reasoning_output)
+    def stream(
+        self,
+        query: str,
+        outcome: str = "ESCALATION",
+        top_k: int = 5
+    ) -> Iterator[Dict]:
+        if self.warmer is None:
+            events = self.reasoning_engine.stream_answer(
+                query=query,
+                outcome=outcome,
+                top_k=top_k
+            )
+            yield from self._explain_events(events)
+        else:
+            self.warmer.observe(query, outcome, top_k)
+            with self.warmer.serving():
+                events = self.reasoning_engine.stream_answer(
+                    query=query,
+                    outcome=outcome,
+                    top_k=top_k
+                )
+                yield from self._explain_events(events)
+
+    def _explain_events(self, events: Iterator[Dict]) -> Iterator[Dict]:
+        for event in events:
+            if event["event"] != "result":
+                yield event
+                continue
+            reasoning_output = event["result"]
+            reasoning_output["global_causal_explanation"] = aggregate_causal_explanations(
+                supporting_calls=reasoning_output["supporting_calls"]
+            )
+            yield {"event": "explanation", "explanation": self.explain(reasoning_output)}
+
+    def run(self, query: str, outcome: str = "ESCALATION", top_k: int = 5):
+        for event in self.stream(query, outcome, top_k):
+            pass
+        return event["explanation"]
+
+
+def start_session(background: bool = None) -> Dict:
+    if background is None:
+        background = config.CLI_BACKGROUND_STARTUP
+
+    return {
+        "session_controller": SessionController(),
+        "query_interpreter": QueryInterpreter(),
+        "reasoning_router": ReasoningRouter(),
+        "response_generator": ResponseGenerator(),
+        "system_loader": BackgroundLoader(
+            lambda: EscalationCausalSystem(verbose=not background),
+            background=background,
+            name="engine-warmup"
+        )
+    }
 
 
 def main():
     print("\n=== Escalation Causal Explanation System (Task 2 Enabled) ===\n")
     print("Ask WHY-type questions. Type 'exit' to quit.\n")
 
-    session_controller = SessionController()
-    query_interpreter = QueryInterpreter()
-    reasoning_router = ReasoningRouter()
-    response_generator = ResponseGenerator()
-    causal_system = EscalationCausalSystem()
+    session = start_session()
+    session_controller = session["session_controller"]
+    query_interpreter = session["query_interpreter"]
+    reasoning_router = session["reasoning_router"]
+    response_generator = session["response_generator"]
+    system_loader = session["system_loader"]
+
+    if not system_loader.ready():
+        print("(loading conversations and indexes in the background)\n")
 
     while True:
         user_query = input("> ").strip()
@@ -46,8 +118,30 @@ def main():
             continue
 
         if user_query.lower() in {"exit", "quit"}:
+            if system_loader.ready():
+                causal_system = system_loader.get()
+                causal_system.reasoning_engine.save_caches()
+                if causal_system.warmer is not None:
+                    causal_system.warmer.save()
             print("\n👋 Ending session. Goodbye!")
             break
+
+        if not system_loader.ready():
+            print("⏳ Finishing engine warm-up...")
+        causal_system = system_loader.get()
+        response_generator.dataset = causal_system.reasoning_engine.dataset
+
+        if user_query.lower().startswith("explain "):
+            from query_planner import format_explain
+
+            plan = causal_system.reasoning_engine.explain_query(
+                user_query[len("explain "):].strip(),
+                outcome="ESCALATION"
+            )
+            print(format_explain(plan))
+            print("\n" + "=" * 60 + "\n")
+            continue
+
         request = session_controller.prepare_request(user_query)
         interpreted = query_interpreter.interpret(
             request["current_query"],
@@ -63,16 +157,17 @@ def main():
             or interpreted.get("query")
             or request["current_query"]
         )
-        result = causal_system.run(
-            query=final_query,
-            outcome=reasoning_plan.get("outcome", "ESCALATION"),
-            top_k=reasoning_plan.get("top_k", 5)
+        result = response_generator.display_events(
+            causal_system.stream(
+                query=final_query,
+                outcome=reasoning_plan.get("outcome", "ESCALATION"),
+                top_k=reasoning_plan.get("top_k", 5)
+            )
         )
         session_controller.store_result(
             user_query=user_query,
             system_result=result
         )
-        response_generator.display(result)
         print("\n" + "=" * 60 + "\n")
 
 
@@ -6,17 +6,85 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATASET_PATH = os.path.join(PROJECT_ROOT, 'dataset', 'Conversational_Transcript_Dataset.json')
 OUTPUTS_DIR = os.path.join(PROJECT_ROOT, 'outputs')
 MODELS_DIR = os.path.join(PROJECT_ROOT, 'models')
+CACHE_DIR = os.path.join(PROJECT_ROOT, 'cache')
+COLUMNAR_EXPORT_DIR = os.path.join(OUTPUTS_DIR, 'columnar')
+SHARED_SEGMENT_DIR = os.path.join(CACHE_DIR, 'segments')
+DENSE_EMBEDDINGS_PATH = os.path.join(CACHE_DIR, 'embeddings.f32')
+STATIC_EMBEDDINGS_PATH = os.path.join(MODELS_DIR, 'static_minilm.npz')
+EVALUATION_GOLD_PATH = os.path.join(PROJECT_ROOT, 'dataset', 'gold_queries.json')
 
 
 EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
 EMBEDDING_DIMENSION = 384
+ENCODER_BACKEND = 'transformer'
+STATIC_VOCAB_SIZE = 30000
+STATIC_SIF_A = 1e-3
 TOP_K_RETRIEVE = 50
 TOP_K_EVIDENCE = 3
+ENCODE_BATCH_SIZE = 1024
+STREAMING_INGEST = True
+STREAMING_QUEUE_BATCHES = 4
+DENSE_OUT_OF_CORE = False
+DENSE_BLOCK_ROWS = 65536
+DENSE_SEARCH_WORKERS = 4
+TFIDF_COMPACTION_RATIO = 0.2
+TFIDF_COMPACTION_MIN_ROWS = 1000
+
+DEDUP_ENABLED = True
+DEDUP_NUM_PERM = 128
+DEDUP_BANDS = 16
+DEDUP_SHINGLE_SIZE = 5
+DEDUP_THRESHOLD = 0.9
+
+SPEAKER_PARTITIONS = ("customer", "agent")
+
+DEADLINE_MS = None
+DEADLINE_CANDIDATE_POOL = 200
+DEADLINE_MIN_CALLS = 2
+DEADLINE_SAFETY_MARGIN = 1.2
+COST_EWMA_ALPHA = 0.2
+
+PLANNER_ENABLED = False
+PLANNER_LEXICAL_MAX_SELECTIVITY = 0.02
+PLANNER_COST_PRIORS = {
+    "factor_lookup": 0.0005,
+    "lexical_scan": 0.002,
+    "semantic_scan": 0.001,
+    "encode": 15.0,
+    "extract": 0.05
+}
 
 
 SEMANTIC_WEIGHT = 0.6
 KEYWORD_WEIGHT = 0.4
 
+
+SEMANTIC_CACHE_ENABLED = True
+SEMANTIC_CACHE_SIZE = 256
+SEMANTIC_CACHE_THRESHOLD = 0.92
+
+QUERY_CACHE_SIZE = 1024
+RESULT_CACHE_SIZE = 512
+NORMALIZED_TURN_CACHE_SIZE = 4096
+CACHE_PERSIST = False
+
+QUERY_LOG_ENABLED = True
+QUERY_LOG_MAX_ENTRIES = 10000
+WARMUP_TOP_N = 20
+WARMUP_COVERAGE_WINDOW_S = 3600
+
+COLUMNAR_FORMAT = 'parquet'
+COLUMNAR_ROW_GROUP_SIZE = 10000
+
+CLI_BACKGROUND_STARTUP = True
+
+VALIDATION_MIN_SUPPORT = 2
+VALIDATION_MIN_SUPPORT_RATE = 0.05
+
+EVALUATION_K = 5
+EVALUATION_CACHE_SIZE = 100000
+FUSION_SWEEP_CANDIDATES = 200
+
 OUTCOME_MAPPING = {
     "ESCALATION": [
         "Escalation - Repeated Service Failures",
@@ -37,6 +105,7 @@ OUTCOME_MAPPING = {
 }
 os.makedirs(OUTPUTS_DIR, exist_ok=True)
 os.makedirs(MODELS_DIR, exist_ok=True)
+os.makedirs(CACHE_DIR, exist_ok=True)
 
 if __name__ == "__main__":
     print("="*60)
@@ -47,12 +116,52 @@ if __name__ == "__main__":
     print(f"Dataset Exists: {os.path.exists(DATASET_PATH)}")
     print(f"Outputs Dir: {OUTPUTS_DIR}")
     print(f"Models Dir: {MODELS_DIR}")
+    print(f"Cache Dir: {CACHE_DIR}")
+    print(f"Shared Segment Dir: {SHARED_SEGMENT_DIR}")
     print(f"\nEmbedding Model: {EMBEDDING_MODEL}")
     print(f"Embedding Dimension: {EMBEDDING_DIMENSION}")
+    print(f"Encoder Backend: {ENCODER_BACKEND}")
+    if ENCODER_BACKEND == 'static':
+        print(f"  Static Vectors: {STATIC_EMBEDDINGS_PATH}")
+        print(f"  Static Vectors Exist: {os.path.exists(STATIC_EMBEDDINGS_PATH)}")
     print(f"\nRetrieval Settings:")
     print(f"  Top-K Retrieve: {TOP_K_RETRIEVE}")
     print(f"  Top-K Evidence: {TOP_K_EVIDENCE}")
+    print(f"  Encode Batch Size: {ENCODE_BATCH_SIZE}")
+    print(f"  Streaming Ingest: {STREAMING_INGEST}")
+    print(f"  Out-of-Core Dense Search: {DENSE_OUT_OF_CORE}")
+    print(f"  TF-IDF Compaction Ratio: {TFIDF_COMPACTION_RATIO}")
+    print(f"  Near-Duplicate Collapsing: {DEDUP_ENABLED} (threshold {DEDUP_THRESHOLD})")
+    print(f"  Speaker Partitions: {', '.join(SPEAKER_PARTITIONS) or 'disabled'}")
+    print(f"  Query Deadline: {DEADLINE_MS} ms")
+    print(f"  Cost-Based Planner: {PLANNER_ENABLED} (lexical max selectivity {PLANNER_LEXICAL_MAX_SELECTIVITY})")
     print(f"  Semantic Weight: {SEMANTIC_WEIGHT}")
     print(f"  Keyword Weight: {KEYWORD_WEIGHT}")
+    print(f"\nSemantic Cache:")
+    print(f"  Enabled: {SEMANTIC_CACHE_ENABLED}")
+    print(f"  Size: {SEMANTIC_CACHE_SIZE}")
+    print(f"  Threshold: {SEMANTIC_CACHE_THRESHOLD}")
+    print(f"\nExact Caches:")
+    print(f"  Query Cache Size: {QUERY_CACHE_SIZE}")
+    print(f"  Result Cache Size: {RESULT_CACHE_SIZE}")
+    print(f"  Normalized Turn Cache Size: {NORMALIZED_TURN_CACHE_SIZE}")
+    print(f"  Persist To Disk: {CACHE_PERSIST}")
+    print(f"\nQuery Log Warm-Up:")
+    print(f"  Enabled: {QUERY_LOG_ENABLED}")
+    print(f"  Top-N Warmed: {WARMUP_TOP_N}")
+    print(f"  Coverage Window: {WARMUP_COVERAGE_WINDOW_S} s")
+    print(f"\nColumnar Export:")
+    print(f"  Dir: {COLUMNAR_EXPORT_DIR}")
+    print(f"  Format: {COLUMNAR_FORMAT}")
+    print(f"  Row Group Size: {COLUMNAR_ROW_GROUP_SIZE}")
+    print(f"\nCLI Background Startup: {CLI_BACKGROUND_STARTUP}")
+    print(f"\nOutcome Validation:")
+    print(f"  Min Support: {VALIDATION_MIN_SUPPORT}")
+    print(f"  Min Support Rate: {VALIDATION_MIN_SUPPORT_RATE}")
+    print(f"\nEvaluation:")
+    print(f"  Gold Queries: {EVALUATION_GOLD_PATH}")
+    print(f"  Gold Queries Exist: {os.path.exists(EVALUATION_GOLD_PATH)}")
+    print(f"  K: {EVALUATION_K}")
+    print(f"  Fusion Sweep Candidates: {FUSION_SWEEP_CANDIDATES}")
     print(f"\nOutcome Types: {list(OUTCOME_MAPPING.keys())}")
     print("="*60)
\ No newline at end of file
@@ -1,63 +1,180 @@
-import json
-from typing import List, Dict, Optional
+import threading
+from typing import Callable, Iterable, List, Dict, Optional
 from collections import defaultdict
 import config
+from dedup import NearDuplicateIndex
+from ingest import iter_transcripts
+from text_pipeline import TextPipeline
+from transcript_store import (
+    CompactTranscriptStore,
+    TranscriptIdMap,
+    TranscriptSequence,
+    TranscriptView
+)
 
 class ConversationDataset:
-    def __init__(self, json_path: str = None):
+    def __init__(
+        self,
+        json_path: str = None,
+        verbose: bool = True,
+        on_batch: Optional[Callable[[CompactTranscriptStore, List[int]], None]] = None,
+        batch_size: int = None,
+        store: Optional[CompactTranscriptStore] = None,
+        dedup=None,
+        text_pipeline: Optional[TextPipeline] = None
+    ):
         if json_path is None:
             json_path = config.DATASET_PATH
+        if batch_size is None:
+            batch_size = config.ENCODE_BATCH_SIZE
+        self.verbose = verbose
         
-        print("="*60)
-        print("LOADING CONVERSATIONAL DATASET")
-        print("="*60)
-        print(f"Loading from: {json_path}")
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        self._log("="*60)
+        self._log("LOADING CONVERSATIONAL DATASET")
+        self._log("="*60)
+        if store is None:
+            self._log(f"Loading from: {json_path}")
+        else:
+            self._log("Attaching to shared transcript store")
         
-        self.transcripts = data['transcripts']
-        print(f"✓ Loaded {len(self.transcripts)} conversations")
-        print("\nBuilding indexes...")
+        self.store = store if store is not None else CompactTranscriptStore()
+        self.transcripts = TranscriptSequence(self.store)
         self.id_to_transcript = self._build_id_index()
-        print(f"✓ ID index: {len(self.id_to_transcript)} conversations")
-        
-        self.domain_index = self._build_domain_index()
-        print(f"✓ Domain index: {len(self.domain_index)} domains")
-        
-        self.intent_index = self._build_intent_index()
-        print(f"✓ Intent index: {len(self.intent_index)} intents")
+        self.domain_index: Dict[str, List[str]] = defaultdict(list)
+        self.intent_index: Dict[str, List[str]] = defaultdict(list)
+        self.outcome_index: Dict[str, List[str]] = defaultdict(list)
+        self.intent_to_outcome = {
+            intent: outcome
+            for outcome, intent_list in config.OUTCOME_MAPPING.items()
+            for intent in intent_list
+        }
+        if dedup is None and config.DEDUP_ENABLED:
+            dedup = NearDuplicateIndex()
+        self.dedup = dedup
+        self._text_pipeline: Optional[TextPipeline] = text_pipeline
+        self._text_pipeline_lock = threading.Lock()
         
-        self.outcome_index = self._build_outcome_index()
-        print(f"✓ Outcome index: {len(self.outcome_index)} outcome types")
+        if store is not None:
+            for index in self.store.live_indices():
+                self._index_transcript(index)
+        else:
+            pending: List[int] = []
+            for transcript in iter_transcripts(json_path):
+                index = self.store.add(transcript)
+                self._index_transcript(index)
+                if self._assign_cluster(index):
+                    pending.append(index)
+                if on_batch is not None and len(pending) >= batch_size:
+                    on_batch(self.store, pending)
+                    pending = []
+            if on_batch is not None and pending:
+                on_batch(self.store, pending)
         
-        self._print_statistics()
-        print("="*60)
-        print("✓ Dataset ready!")
-        print("="*60)
-    
-    def _build_id_index(self) -> Dict[str, Dict]:
-        return {t['transcript_id']: t for t in self.transcripts}
-    
-    def _build_domain_index(self) -> Dict[str, List[str]]:
-        index = defaultdict(list)
-        for t in self.transcripts:
-            index[t['domain']].append(t['transcript_id'])
-        return dict(index)
-    
-    def _build_intent_index(self) -> Dict[str, List[str]]:
-        index = defaultdict(list)
-        for t in self.transcripts:
-            index[t['intent']].append(t['transcript_id'])
-        return dict(index)
-    
-    def _build_outcome_index(self) -> Dict[str, List[str]]:
-        index = defaultdict(list)
-        for outcome, intent_list in config.OUTCOME_MAPPING.items():
-            for intent in intent_list:
-                if intent in self.intent_index:
-                    index[outcome].extend(self.intent_index[intent])
+        self._log(f"✓ Loaded {len(self.transcripts)} conversations")
+        if isinstance(self.dedup, NearDuplicateIndex):
+            dedup_stats = self.dedup.stats()
+            self._log(
+                f"✓ Near-duplicate clusters: {dedup_stats['clusters']} representatives "
+                f"({dedup_stats['duplicates_collapsed']} duplicates collapsed)"
+            )
+        self._log("\nIndexes built during ingest:")
+        self._log(f"✓ ID index: {len(self.id_to_transcript)} conversations")
+        self._log(f"✓ Domain index: {len(self.domain_index)} domains")
+        self._log(f"✓ Intent index: {len(self.intent_index)} intents")
+        self._log(f"✓ Outcome index: {len(self.outcome_index)} outcome types")
+
+        self.fingerprint = self.store.fingerprint()
+        self._log(f"✓ Dataset fingerprint: {self.fingerprint}")
         
-        return dict(index)
+        if verbose:
+            self._print_statistics()
+        self._log("="*60)
+        self._log("✓ Dataset ready!")
+        self._log("="*60)
+    
+    def _log(self, *args):
+        if self.verbose:
+            print(*args)
+    
+    def _build_id_index(self) -> TranscriptIdMap:
+        return TranscriptIdMap(self.store)
+    
+    def _index_transcript(self, index: int):
+        store = self.store
+        transcript_id = store.transcript_ids[index]
+        intent = store.intents.values[store.intent_codes[index]]
+        self.domain_index[store.domains.values[store.domain_codes[index]]].append(transcript_id)
+        self.intent_index[intent].append(transcript_id)
+        outcome = self.intent_to_outcome.get(intent)
+        if outcome is not None:
+            self.outcome_index[outcome].append(transcript_id)
+    
+    def _assign_cluster(self, index: int) -> bool:
+        if self.dedup is None:
+            return True
+        conv = TranscriptView(self.store, index)
+        return self.dedup.add(index, conv['conversation'], scope=conv['intent']) == index
+    
+    @property
+    def text_pipeline(self) -> TextPipeline:
+        with self._text_pipeline_lock:
+            if self._text_pipeline is None:
+                self._text_pipeline = TextPipeline.load_or_build(self.store)
+        return self._text_pipeline
+    
+    def searchable_indices(self) -> List[int]:
+        return [i for i in self.store.live_indices() if self.is_searchable(i)]
+    
+    def is_searchable(self, index: int) -> bool:
+        if not self.store.is_alive(index):
+            return False
+        return self.dedup is None or self.dedup.is_representative(index)
+    
+    def representative(self, index: int) -> Optional[int]:
+        if self.dedup is None:
+            return index if self.store.is_alive(index) else None
+        return self.dedup.representative(index)
+    
+    def cluster_size(self, index: int) -> int:
+        if self.dedup is None:
+            return 1
+        return self.dedup.cluster_size(index)
+    
+    def add_transcripts(self, transcripts: Iterable[Dict]) -> List[int]:
+        added = []
+        for transcript in transcripts:
+            if transcript['transcript_id'] in self.store.id_to_index:
+                self.remove_transcripts([transcript['transcript_id']])
+            index = self.store.add(transcript)
+            self._index_transcript(index)
+            self._assign_cluster(index)
+            added.append(index)
+        self.fingerprint = self.store.fingerprint()
+        return added
+    
+    def remove_transcripts(self, transcript_ids: Iterable[str]) -> List[int]:
+        removed = []
+        for transcript_id in transcript_ids:
+            conv = self.store.get(transcript_id)
+            if conv is None:
+                continue
+            self._unindex(self.domain_index, conv['domain'], transcript_id)
+            self._unindex(self.intent_index, conv['intent'], transcript_id)
+            outcome = self.intent_to_outcome.get(conv['intent'])
+            if outcome is not None:
+                self._unindex(self.outcome_index, outcome, transcript_id)
+            index = self.store.remove(transcript_id)
+            if self.dedup is not None:
+                self.dedup.remove(index)
+            removed.append(index)
+        self.fingerprint = self.store.fingerprint()
+        return removed
+    
+    def _unindex(self, index: Dict[str, List[str]], key: str, transcript_id: str):
+        ids = index[key]
+        ids.remove(transcript_id)
+        if not ids:
+            del index[key]
     
     def _print_statistics(self):
         print("\n" + "-"*60)
@@ -76,15 +193,15 @@ class ConversationDataset:
                                    reverse=True):
             print(f"  {outcome}: {len(ids)} conversations")
         
-        lengths = [len(t['conversation']) for t in self.transcripts]
+        lengths = self.store.statistics()
         print(f"\nConversation Lengths:")
-        print(f"  Min: {min(lengths)} turns")
-        print(f"  Max: {max(lengths)} turns")
-        print(f"  Avg: {sum(lengths)/len(lengths):.1f} turns")
+        print(f"  Min: {lengths['min_turns']} turns")
+        print(f"  Max: {lengths['max_turns']} turns")
+        print(f"  Avg: {lengths['avg_turns']:.1f} turns")
         print("-"*60)
     
     def get_conversation(self, transcript_id: str) -> Optional[Dict]:
-        return self.id_to_transcript.get(transcript_id)
+        return self.store.get(transcript_id)
     
     def get_conversations_by_domain(self, domain: str) -> List[Dict]:
         ids = self.domain_index.get(domain, [])
@@ -102,16 +219,16 @@ class ConversationDataset:
         return self.transcripts
     
     def get_statistics(self) -> Dict:
-        lengths = [len(t['conversation']) for t in self.transcripts]
+        lengths = self.store.statistics()
         
         return {
             'total_conversations': len(self.transcripts),
             'total_domains': len(self.domain_index),
             'total_intents': len(self.intent_index),
             'total_outcome_types': len(self.outcome_index),
-            'min_turns': min(lengths),
-            'max_turns': max(lengths),
-            'avg_turns': sum(lengths) / len(lengths),
+            'min_turns': lengths['min_turns'],
+            'max_turns': lengths['max_turns'],
+            'avg_turns': lengths['avg_turns'],
             'domain_distribution': {
                 domain: len(ids) for domain, ids in self.domain_index.items()
             },
@@ -0,0 +1,108 @@
+import time
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import config
+
+DEGRADATIONS = (
+    "lexical_only",
+    "reduced_candidates",
+    "cached_factors",
+    "truncated_evidence",
+    "full_index_speaker"
+)
+
+
+class Deadline:
+    def __init__(self, budget_ms: Optional[float]):
+        self.budget_ms = budget_ms
+        self.started_at = time.perf_counter()
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget_ms is not None
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started_at) * 1000
+
+    def remaining_ms(self) -> float:
+        if self.budget_ms is None:
+            return float("inf")
+        return self.budget_ms - self.elapsed_ms()
+
+    def allows(self, estimated_ms: float) -> bool:
+        return estimated_ms * config.DEADLINE_SAFETY_MARGIN <= self.remaining_ms()
+
+    def expired(self) -> bool:
+        return self.remaining_ms() <= 0
+
+    def summary(self) -> Dict:
+        elapsed = self.elapsed_ms()
+        return {
+            "budget_ms": self.budget_ms,
+            "elapsed_ms": round(elapsed, 2),
+            "met": elapsed <= self.budget_ms
+        }
+
+
+class StageCostModel:
+    def __init__(self, alpha: float = None):
+        self.alpha = config.COST_EWMA_ALPHA if alpha is None else alpha
+        self.unit_costs: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, elapsed_ms: float, units: float = 1):
+        if units <= 0:
+            return
+        unit_cost = elapsed_ms / units
+        with self._lock:
+            previous = self.unit_costs.get(stage)
+            self.unit_costs[stage] = (
+                unit_cost if previous is None
+                else self.alpha * unit_cost + (1 - self.alpha) * previous
+            )
+
+    def estimate(self, stage: str, units: float = 1) -> float:
+        return self.unit_costs.get(stage, 0.0) * units
+
+
+class DegradationMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.deadline_queries = 0
+        self.deadline_misses = 0
+        self.degraded_queries = 0
+        self.counts: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, deadline: Deadline, degradations: List[str]):
+        with self._lock:
+            self.queries += 1
+            if not deadline.enabled:
+                return
+            self.deadline_queries += 1
+            if deadline.elapsed_ms() > deadline.budget_ms:
+                self.deadline_misses += 1
+            if degradations:
+                self.degraded_queries += 1
+            for name in degradations:
+                self.counts[name] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.deadline_queries
+            return {
+                "queries": self.queries,
+                "deadline_queries": total,
+                "degraded_queries": self.degraded_queries,
+                "deadline_misses": self.deadline_misses,
+                "miss_rate": round(self.deadline_misses / total, 4) if total else 0.0,
+                "degradations": {
+                    name: {
+                        "count": self.counts[name],
+                        "rate": round(self.counts[name] / total, 4) if total else 0.0
+                    }
+                    for name in DEGRADATIONS
+                }
+            }
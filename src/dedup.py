@@ -0,0 +1,173 @@
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+import config
+
+MERSENNE_PRIME = (1 << 31) - 1
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def turn_shingles(conversation: Sequence, shingle_size: int) -> np.ndarray:
+    hashes = set()
+    for turn in conversation:
+        tokens = TOKEN_PATTERN.findall(turn["text"].lower())
+        if not tokens:
+            continue
+        if len(tokens) <= shingle_size:
+            hashes.add(zlib.crc32(" ".join(tokens).encode("utf-8")))
+            continue
+        for i in range(len(tokens) - shingle_size + 1):
+            shingle = " ".join(tokens[i:i + shingle_size])
+            hashes.add(zlib.crc32(shingle.encode("utf-8")))
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+
+class NearDuplicateIndex:
+    def __init__(
+        self,
+        num_perm: int = None,
+        bands: int = None,
+        shingle_size: int = None,
+        threshold: float = None,
+        seed: int = 1
+    ):
+        self.num_perm = config.DEDUP_NUM_PERM if num_perm is None else num_perm
+        self.bands = config.DEDUP_BANDS if bands is None else bands
+        self.shingle_size = (
+            config.DEDUP_SHINGLE_SIZE if shingle_size is None else shingle_size
+        )
+        self.threshold = config.DEDUP_THRESHOLD if threshold is None else threshold
+        if self.num_perm % self.bands:
+            raise ValueError(
+                f"num_perm ({self.num_perm}) must be divisible by bands ({self.bands})"
+            )
+        self.rows_per_band = self.num_perm // self.bands
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, MERSENNE_PRIME, size=self.num_perm).astype(np.uint64)
+        self._b = rng.randint(0, MERSENNE_PRIME, size=self.num_perm).astype(np.uint64)
+
+        self.buckets: Dict[tuple, List[int]] = defaultdict(list)
+        self.cluster_keys: Dict[int, List[tuple]] = {}
+        self.signatures: Dict[int, np.ndarray] = {}
+        self.scopes: Dict[int, Hashable] = {}
+        self.cluster_of: Dict[int, int] = {}
+        self.members: Dict[int, List[int]] = {}
+
+    def signature(self, shingles: np.ndarray) -> np.ndarray:
+        x = shingles % MERSENNE_PRIME
+        hashed = (self._a[:, None] * x[None, :] + self._b[:, None]) % MERSENNE_PRIME
+        return hashed.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray, scope: Hashable) -> List[tuple]:
+        r = self.rows_per_band
+        return [
+            (scope, band, signature[band * r:(band + 1) * r].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def add(self, index: int, conversation: Sequence, scope: Hashable = None) -> int:
+        shingles = turn_shingles(conversation, self.shingle_size)
+        if not len(shingles):
+            self.cluster_of[index] = index
+            self.members[index] = [index]
+            return index
+
+        signature = self.signature(shingles)
+        keys = self._band_keys(signature, scope)
+
+        best_cluster = None
+        best_similarity = self.threshold
+        seen = set()
+        for key in keys:
+            for cluster in self.buckets.get(key, ()):
+                if cluster in seen:
+                    continue
+                seen.add(cluster)
+                members = self.members.get(cluster)
+                if not members:
+                    continue
+                similarity = float(np.mean(self.signatures[members[0]] == signature))
+                if similarity >= best_similarity:
+                    best_cluster = cluster
+                    best_similarity = similarity
+
+        self.signatures[index] = signature
+        self.scopes[index] = scope
+        if best_cluster is not None:
+            self.cluster_of[index] = best_cluster
+            self.members[best_cluster].append(index)
+            return self.members[best_cluster][0]
+
+        self.cluster_of[index] = index
+        self.members[index] = [index]
+        self._register(index, keys)
+        return index
+
+    def _register(self, cluster: int, keys: List[tuple]):
+        self.cluster_keys[cluster] = keys
+        for key in keys:
+            self.buckets[key].append(cluster)
+
+    def _unregister(self, cluster: int):
+        for key in self.cluster_keys.pop(cluster, ()):
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                continue
+            if cluster in bucket:
+                bucket.remove(cluster)
+            if not bucket:
+                del self.buckets[key]
+
+    def remove(self, index: int) -> Optional[int]:
+        cluster = self.cluster_of.get(index)
+        members = self.members.get(cluster)
+        if members is None or index not in members:
+            return None
+
+        was_representative = members[0] == index
+        members.remove(index)
+        del self.cluster_of[index]
+        self.signatures.pop(index, None)
+        self.scopes.pop(index, None)
+        if not members:
+            del self.members[cluster]
+            self._unregister(cluster)
+            return None
+        if not was_representative:
+            return None
+
+        self._unregister(cluster)
+        promoted = members[0]
+        signature = self.signatures.get(promoted)
+        if signature is not None:
+            self._register(cluster, self._band_keys(signature, self.scopes[promoted]))
+        return promoted
+
+    def representative(self, index: int) -> Optional[int]:
+        members = self.members.get(self.cluster_of.get(index))
+        return members[0] if members else None
+
+    def is_representative(self, index: int) -> bool:
+        return self.representative(index) == index
+
+    def cluster_size(self, index: int) -> int:
+        members = self.members.get(self.cluster_of.get(index))
+        return len(members) if members else 0
+
+    def cluster_members(self, index: int) -> List[int]:
+        return list(self.members.get(self.cluster_of.get(index), ()))
+
+    def stats(self) -> Dict:
+        clusters = len(self.members)
+        items = sum(len(m) for m in self.members.values())
+        return {
+            "conversations": items,
+            "clusters": clusters,
+            "duplicates_collapsed": items - clusters,
+            "duplication_rate": round((items - clusters) / items, 4) if items else 0.0
+        }
@@ -0,0 +1,133 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, Optional, Tuple
+
+import numpy as np
+
+import config
+
+
+class BlockedDenseIndex:
+    def __init__(
+        self,
+        path: str,
+        dimension: int = None,
+        block_rows: int = None,
+        workers: int = None
+    ):
+        self.path = path
+        self.dimension = config.EMBEDDING_DIMENSION if dimension is None else dimension
+        self.block_rows = config.DENSE_BLOCK_ROWS if block_rows is None else block_rows
+        self.workers = config.DENSE_SEARCH_WORKERS if workers is None else workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.matrix = self._map()
+
+    @classmethod
+    def wrap(
+        cls,
+        matrix: np.ndarray,
+        block_rows: int = None,
+        workers: int = None
+    ) -> "BlockedDenseIndex":
+        index = cls.__new__(cls)
+        index.path = None
+        index.dimension = matrix.shape[1]
+        index.block_rows = config.DENSE_BLOCK_ROWS if block_rows is None else block_rows
+        index.workers = config.DENSE_SEARCH_WORKERS if workers is None else workers
+        index._executor = None
+        index.matrix = matrix
+        return index
+
+    @classmethod
+    def create(cls, path: str, dimension: int = None, **kwargs) -> "BlockedDenseIndex":
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        open(path, "wb").close()
+        return cls(path, dimension, **kwargs)
+
+    def _map(self) -> np.ndarray:
+        rows = os.path.getsize(self.path) // (4 * self.dimension)
+        if not rows:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.memmap(
+            self.path, dtype=np.float32, mode="r", shape=(rows, self.dimension)
+        )
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.matrix.shape
+
+    def append(self, block: np.ndarray):
+        if self.path is None:
+            raise RuntimeError("Wrapped embedding matrices are read-only")
+        with open(self.path, "ab") as f:
+            f.write(np.ascontiguousarray(block, dtype=np.float32).tobytes())
+        self.matrix = self._map()
+
+    def _blocks(self, limit: int) -> Iterator[Tuple[int, int]]:
+        for start in range(0, limit, self.block_rows):
+            yield start, min(start + self.block_rows, limit)
+
+    def _map_blocks(self, fn: Callable, limit: int) -> Iterator:
+        if self.workers <= 1:
+            return map(fn, self._blocks(limit))
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="dense-search"
+            )
+        return self._executor.map(fn, self._blocks(limit))
+
+    def scores(self, queries: np.ndarray, limit: int = None) -> np.ndarray:
+        queries = np.atleast_2d(queries).astype(np.float32, copy=False)
+        matrix = self.matrix
+        limit = matrix.shape[0] if limit is None else limit
+        out = np.empty((queries.shape[0], limit), dtype=np.float32)
+
+        def score_block(bounds):
+            start, stop = bounds
+            out[:, start:stop] = queries @ np.asarray(matrix[start:stop]).T
+
+        for _ in self._map_blocks(score_block, limit):
+            pass
+        return out
+
+    def search(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        mask: Optional[np.ndarray] = None,
+        limit: int = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.atleast_2d(queries).astype(np.float32, copy=False)
+        matrix = self.matrix
+        limit = matrix.shape[0] if limit is None else limit
+        k = min(top_k, limit)
+        best_scores = np.full((queries.shape[0], k), -np.inf, dtype=np.float32)
+        best_indices = np.full((queries.shape[0], k), -1, dtype=np.int64)
+        if not k:
+            return best_scores, best_indices
+
+        def block_top_k(bounds):
+            start, stop = bounds
+            scores = queries @ np.asarray(matrix[start:stop]).T
+            if mask is not None:
+                scores[:, ~mask[start:stop]] = -np.inf
+            depth = min(k, stop - start)
+            top = np.argpartition(-scores, depth - 1, axis=1)[:, :depth]
+            return np.take_along_axis(scores, top, axis=1), top + start
+
+        for scores, indices in self._map_blocks(block_top_k, limit):
+            merged_scores = np.concatenate([best_scores, scores], axis=1)
+            merged_indices = np.concatenate([best_indices, indices], axis=1)
+            keep = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(merged_scores, keep, axis=1)
+            best_indices = np.take_along_axis(merged_indices, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_indices = np.take_along_axis(best_indices, order, axis=1)
+        best_indices[~np.isfinite(best_scores)] = -1
+        return best_scores, best_indices
@@ -0,0 +1,275 @@
+import os
+import re
+import time
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+import config
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class TransformerEncoder:
+    backend = "transformer"
+
+    def __init__(self, model_name: str = None):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = config.EMBEDDING_MODEL if model_name is None else model_name
+        self.model = SentenceTransformer(self.model_name)
+        self.name = f"transformer:{self.model_name}"
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str], show_progress_bar: bool = False) -> np.ndarray:
+        return np.asarray(
+            self.model.encode(
+                texts,
+                show_progress_bar=show_progress_bar,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            ),
+            dtype=np.float32
+        )
+
+
+class StaticEncoder:
+    backend = "static"
+
+    def __init__(self, path: str = None):
+        self.path = config.STATIC_EMBEDDINGS_PATH if path is None else path
+        with np.load(self.path, allow_pickle=False) as static:
+            self.vectors = static["vectors"].astype(np.float32, copy=False)
+            self.weights = static["weights"].astype(np.float32, copy=False)
+            self.vocabulary = static["vocabulary"].tolist()
+            self.source_model = str(static["source_model"])
+        self.token_to_row = {token: row for row, token in enumerate(self.vocabulary)}
+        self.dimension = self.vectors.shape[1]
+        digest = hashlib.sha1(self.vectors.tobytes()).hexdigest()[:12]
+        self.name = f"static:{self.source_model}:{digest}"
+
+    @classmethod
+    def attach(cls, arrays: Dict[str, np.ndarray], metadata: Dict) -> "StaticEncoder":
+        encoder = cls.__new__(cls)
+        encoder.path = None
+        encoder.vectors = arrays["vectors"]
+        encoder.weights = arrays["weights"]
+        encoder.vocabulary = metadata["vocabulary"]
+        encoder.source_model = metadata["source_model"]
+        encoder.token_to_row = {token: row for row, token in enumerate(encoder.vocabulary)}
+        encoder.dimension = encoder.vectors.shape[1]
+        encoder.name = metadata["name"]
+        return encoder
+
+    def encode(self, texts: List[str], show_progress_bar: bool = False) -> np.ndarray:
+        out = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            rows = [
+                self.token_to_row[token] for token in tokenize(text)
+                if token in self.token_to_row
+            ]
+            if not rows:
+                continue
+            weights = self.weights[rows]
+            pooled = weights @ self.vectors[rows]
+            norm = np.linalg.norm(pooled)
+            if norm > 0:
+                out[i] = pooled / norm
+        return out
+
+
+class DeferredEncoder:
+    def __init__(self, backend: str, name: str, dimension: int):
+        self.backend = backend
+        self.name = name
+        self.dimension = dimension
+        self._encoder = None
+        self._lock = threading.Lock()
+
+    def encode(self, texts: List[str], show_progress_bar: bool = False) -> np.ndarray:
+        with self._lock:
+            if self._encoder is None:
+                encoder = load_encoder(self.backend)
+                if encoder.name != self.name:
+                    raise RuntimeError(
+                        f"Encoder '{encoder.name}' does not match the published "
+                        f"index encoder '{self.name}'; republish the segments"
+                    )
+                self._encoder = encoder
+        return self._encoder.encode(texts, show_progress_bar=show_progress_bar)
+
+
+ENCODER_BACKENDS = {
+    "transformer": TransformerEncoder,
+    "static": StaticEncoder
+}
+
+
+def load_encoder(backend: str = None):
+    backend = config.ENCODER_BACKEND if backend is None else backend
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(
+            f"Unknown encoder backend '{backend}'; expected one of {sorted(ENCODER_BACKENDS)}"
+        )
+    return ENCODER_BACKENDS[backend]()
+
+
+def export_encoder(encoder) -> Tuple[Dict[str, np.ndarray], Dict]:
+    metadata = {
+        "backend": getattr(encoder, "backend", config.ENCODER_BACKEND),
+        "name": encoder.name,
+        "dimension": encoder.dimension
+    }
+    if not isinstance(encoder, StaticEncoder):
+        return {}, metadata
+    metadata.update(vocabulary=encoder.vocabulary, source_model=encoder.source_model)
+    return {"vectors": encoder.vectors, "weights": encoder.weights}, metadata
+
+
+def attach_encoder(arrays: Dict[str, np.ndarray], metadata: Dict):
+    if metadata["backend"] == "static" and arrays:
+        return StaticEncoder.attach(arrays, metadata)
+    return DeferredEncoder(metadata["backend"], metadata["name"], metadata["dimension"])
+
+
+def distill_static_vectors(
+    texts: Iterable[str],
+    output_path: str = None,
+    vocab_size: int = None,
+    encoder: Optional[TransformerEncoder] = None
+) -> str:
+    output_path = config.STATIC_EMBEDDINGS_PATH if output_path is None else output_path
+    vocab_size = config.STATIC_VOCAB_SIZE if vocab_size is None else vocab_size
+    encoder = TransformerEncoder() if encoder is None else encoder
+
+    counts = Counter()
+    for text in texts:
+        counts.update(tokenize(text))
+    vocabulary = [token for token, _ in counts.most_common(vocab_size)]
+    total = sum(counts[token] for token in vocabulary)
+    frequencies = np.array([counts[token] / total for token in vocabulary])
+    weights = config.STATIC_SIF_A / (config.STATIC_SIF_A + frequencies)
+
+    vectors = np.vstack([
+        encoder.encode(vocabulary[start:start + config.ENCODE_BATCH_SIZE])
+        for start in range(0, len(vocabulary), config.ENCODE_BATCH_SIZE)
+    ]) if vocabulary else np.zeros((0, encoder.dimension), dtype=np.float32)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = output_path + ".tmp.npz"
+    np.savez(
+        tmp_path,
+        vectors=vectors.astype(np.float32),
+        weights=weights.astype(np.float32),
+        vocabulary=np.array(vocabulary),
+        source_model=np.array(encoder.model_name)
+    )
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def compare_backends(
+    dataset,
+    queries: List[str],
+    gold: Optional[List[set]] = None,
+    backends: Iterable[str] = ("transformer", "static"),
+    k: int = None
+) -> "pd.DataFrame":
+    import pandas as pd
+    from retriever import HybridRetriever
+
+    k = config.EVALUATION_K if k is None else k
+    rankings: Dict[str, List[List[str]]] = {}
+    rows = []
+    for backend in backends:
+        started = time.perf_counter()
+        encoder = load_encoder(backend)
+        load_ms = (time.perf_counter() - started) * 1000
+
+        retriever = HybridRetriever(dataset, verbose=False, embedder=encoder)
+        latencies = []
+        for query in queries:
+            started = time.perf_counter()
+            encoder.encode([query])
+            latencies.append((time.perf_counter() - started) * 1000)
+        rankings[backend] = [
+            [r["transcript_id"] for r in retriever.search(q, top_k=k)]
+            for q in queries
+        ]
+
+        row = {
+            "backend": backend,
+            "encoder": encoder.name,
+            "load_ms": round(load_ms, 1),
+            "encode_ms_mean": round(float(np.mean(latencies)), 3) if latencies else None,
+            "encode_ms_p95": round(float(np.percentile(latencies, 95)), 3) if latencies else None
+        }
+        if gold is not None:
+            labelled = [(r, g) for r, g in zip(rankings[backend], gold) if g]
+            row[f"recall@{k}"] = round(float(np.mean([
+                len(set(r) & g) / len(g) for r, g in labelled
+            ])), 4) if labelled else None
+        rows.append(row)
+
+    reference = rankings.get("transformer")
+    for row in rows:
+        if reference is None:
+            break
+        row[f"overlap@{k}_vs_transformer"] = round(float(np.mean([
+            len(set(a) & set(b)) / max(len(b), 1)
+            for a, b in zip(rankings[row["backend"]], reference)
+        ])), 4) if queries else None
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distil and compare query encoder backends")
+    parser.add_argument("command", choices=("distill", "compare"))
+    parser.add_argument("--gold", default=config.EVALUATION_GOLD_PATH)
+    parser.add_argument("--vocab-size", type=int, default=config.STATIC_VOCAB_SIZE)
+    args = parser.parse_args()
+
+    from data_loader import ConversationDataset
+    from retriever import build_document_text
+
+    dataset = ConversationDataset(verbose=False)
+    if args.command == "distill":
+        started = time.perf_counter()
+        path = distill_static_vectors(
+            (build_document_text(conv) for conv in dataset.transcripts),
+            vocab_size=args.vocab_size
+        )
+        print(f"Static vectors → {path} ({time.perf_counter() - started:.1f}s)")
+    else:
+        from batch_runner import QUERIES
+        from evaluation import load_gold_queries, representative_ids
+
+        if os.path.exists(args.gold):
+            gold_queries = load_gold_queries(args.gold)
+            queries = [item["query"] for item in gold_queries]
+            gold = [
+                set(representative_ids(dataset, item["gold_transcript_ids"]))
+                for item in gold_queries
+            ]
+        else:
+            queries = [item["query"] for item in QUERIES]
+            gold = None
+
+        report = compare_backends(dataset, queries, gold)
+        output_path = os.path.join(config.OUTPUTS_DIR, "encoder_comparison.csv")
+        report.to_csv(output_path, index=False)
+
+        print("=" * 60)
+        print("ENCODER BACKEND COMPARISON")
+        print("=" * 60)
+        print(f"Queries: {len(queries)}")
+        print(report.to_string(index=False))
+        print(f"\nReport → {output_path}")
+        print("=" * 60)
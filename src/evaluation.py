@@ -0,0 +1,254 @@
+import os
+import sys
+import json
+import hashlib
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+import config
+from causal_patterns import CAUSAL_PATTERNS
+from result_cache import LRUCache, normalize_query
+from reasoning_engine import CausalReasoningEngine
+
+
+def load_gold_queries(path: str) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            items = [json.loads(line) for line in f if line.strip()]
+        else:
+            data = json.load(f)
+            items = data['queries'] if isinstance(data, dict) else data
+
+    for idx, item in enumerate(items):
+        item.setdefault('id', f"G{idx + 1}")
+        item.setdefault('outcome', 'ESCALATION')
+        item.setdefault('gold_transcript_ids', [])
+        item.setdefault('gold_turns', [])
+        item.setdefault('gold_factors', [])
+    return items
+
+
+def representative_ids(dataset, transcript_ids: List[str]) -> List[str]:
+    store = dataset.store
+    mapped = []
+    for transcript_id in transcript_ids:
+        index = store.id_to_index.get(transcript_id)
+        representative = dataset.representative(index) if index is not None else None
+        mapped.append(
+            store.transcript_ids[representative]
+            if representative is not None else transcript_id
+        )
+    return list(dict.fromkeys(mapped))
+
+
+def _encode_rows(rows: List[List], vocab: Dict) -> np.ndarray:
+    width = max((len(r) for r in rows), default=0)
+    codes = np.full((len(rows), max(width, 1)), -1, dtype=np.int64)
+    for i, row in enumerate(rows):
+        for j, value in enumerate(row):
+            codes[i, j] = vocab.setdefault(value, len(vocab))
+    return codes
+
+
+def _membership(predicted: np.ndarray, gold: np.ndarray) -> np.ndarray:
+    matches = predicted[:, :, None] == gold[:, None, :]
+    return matches.any(axis=2) & (predicted >= 0)
+
+
+def _safe_ratio(
+    numerator: np.ndarray,
+    denominator: np.ndarray,
+    labelled: Optional[np.ndarray] = None
+) -> np.ndarray:
+    out = np.full(numerator.shape, np.nan)
+    mask = denominator > 0
+    if labelled is not None:
+        mask &= labelled
+    out[mask] = numerator[mask] / denominator[mask]
+    return out
+
+
+def compute_metrics(
+    predictions: List[Dict],
+    gold_queries: List[Dict],
+    k: int
+) -> Dict[str, np.ndarray]:
+    ids = {}
+    retrieved = _encode_rows([p['retrieved'][:k] for p in predictions], ids)
+    gold_ids = _encode_rows([g['gold_transcript_ids'] for g in gold_queries], ids)
+
+    turns = {}
+    evidence = _encode_rows(
+        [[tuple(t) for t in p['evidence_turns']] for p in predictions],
+        turns
+    )
+    gold_turns = _encode_rows(
+        [[tuple(t) for t in g['gold_turns']] for g in gold_queries],
+        turns
+    )
+
+    factor_names = list(CAUSAL_PATTERNS)
+    factor_index = {name: i for i, name in enumerate(factor_names)}
+    predicted_factors = np.zeros((len(predictions), len(factor_names)), dtype=bool)
+    expected_factors = np.zeros_like(predicted_factors)
+    for i, (p, g) in enumerate(zip(predictions, gold_queries)):
+        predicted_factors[i, [factor_index[f] for f in p['factors'] if f in factor_index]] = True
+        expected_factors[i, [factor_index[f] for f in g['gold_factors'] if f in factor_index]] = True
+
+    id_hits = _membership(retrieved, gold_ids)
+    num_gold_ids = (gold_ids >= 0).sum(axis=1)
+    num_retrieved = (retrieved >= 0).sum(axis=1)
+    first_hit = id_hits.argmax(axis=1)
+    reciprocal_rank = np.where(id_hits.any(axis=1), 1.0 / (first_hit + 1), 0.0)
+
+    turn_hits = _membership(evidence, gold_turns)
+    gold_turn_hits = _membership(gold_turns, evidence)
+    num_evidence = (evidence >= 0).sum(axis=1)
+    num_gold_turns = (gold_turns >= 0).sum(axis=1)
+
+    factor_tp = (predicted_factors & expected_factors).sum(axis=1)
+    num_gold_factors = expected_factors.sum(axis=1)
+
+    gold_turn_sets = [{tuple(t) for t in g['gold_turns']} for g in gold_queries]
+    grounded = np.array([
+        sum(
+            1 for f in p['factors']
+            if any(tuple(t) in gold for t in p['factor_evidence'].get(f, []))
+        )
+        for p, gold in zip(predictions, gold_turn_sets)
+    ], dtype=float)
+    reported = np.array([len(p['factors']) for p in predictions], dtype=float)
+
+    return {
+        f'recall@{k}': _safe_ratio(id_hits.sum(axis=1).astype(float), num_gold_ids),
+        f'precision@{k}': _safe_ratio(
+            id_hits.sum(axis=1).astype(float), num_retrieved, num_gold_ids > 0
+        ),
+        'mrr': np.where(num_gold_ids > 0, reciprocal_rank, np.nan),
+        'evidence_precision': _safe_ratio(
+            turn_hits.sum(axis=1).astype(float), num_evidence, num_gold_turns > 0
+        ),
+        'evidence_recall': _safe_ratio(gold_turn_hits.sum(axis=1).astype(float), num_gold_turns),
+        'factor_precision': _safe_ratio(
+            factor_tp.astype(float), predicted_factors.sum(axis=1), num_gold_factors > 0
+        ),
+        'factor_recall': _safe_ratio(factor_tp.astype(float), num_gold_factors),
+        'evidence_grounding': _safe_ratio(grounded, reported, num_gold_turns > 0)
+    }
+
+
+class EvaluationHarness:
+    def __init__(self, engine, k: int = None, cache_path: Optional[str] = None):
+        self.engine = engine
+        self.k = k or config.EVALUATION_K
+        if cache_path is None:
+            cache_path = os.path.join(config.CACHE_DIR, 'evaluation_cache.pkl')
+        self.cache = LRUCache(config.EVALUATION_CACHE_SIZE, persist_path=cache_path)
+        self.recomputed = 0
+
+    def _prediction_key(self, item: Dict) -> str:
+        payload = json.dumps([
+            normalize_query(item['query']),
+            item['outcome'],
+            self.k,
+            config.SEMANTIC_WEIGHT,
+            config.KEYWORD_WEIGHT,
+            config.PLANNER_ENABLED,
+            config.DEADLINE_MS,
+            config.DEDUP_ENABLED,
+            config.DEDUP_THRESHOLD,
+            list(self.engine.cache_version()),
+            list(self.engine.retriever.index_version)
+        ], default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def predict(self, item: Dict) -> Dict:
+        key = self._prediction_key(item)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        output = self.engine.answer_query(
+            query=item['query'],
+            outcome=item['outcome'],
+            top_k=self.k,
+            use_cache=False
+        )
+
+        evidence_turns = []
+        factor_evidence: Dict[str, List] = {}
+        for call in output['supporting_calls']:
+            for factor in call['causal_explanation']['causal_factors']:
+                for turn in factor['evidence_turns']:
+                    ref = (call['transcript_id'], turn['turn_id'])
+                    evidence_turns.append(ref)
+                    factor_evidence.setdefault(factor['factor'], []).append(ref)
+
+        factors = [
+            f['factor']
+            for f in output['global_causal_explanation']['global_causal_factors']
+        ]
+        prediction = {
+            'retrieved': [call['transcript_id'] for call in output['supporting_calls']],
+            'evidence_turns': list(dict.fromkeys(evidence_turns)),
+            'factors': factors,
+            'factor_evidence': {f: factor_evidence.get(f, []) for f in factors}
+        }
+        if not output.get('degradations'):
+            self.cache.put(key, prediction)
+        self.recomputed += 1
+        return prediction
+
+    def evaluate(self, gold_queries: List[Dict]) -> Dict:
+        self.recomputed = 0
+        predictions = [self.predict(item) for item in gold_queries]
+        gold_queries = [
+            {
+                **item,
+                'gold_transcript_ids': representative_ids(
+                    self.engine.dataset, item['gold_transcript_ids']
+                )
+            }
+            for item in gold_queries
+        ]
+        metrics = compute_metrics(predictions, gold_queries, self.k)
+        self.cache.save()
+
+        summary = {
+            name: (round(float(np.nanmean(values)), 4)
+                   if np.any(~np.isnan(values)) else None)
+            for name, values in metrics.items()
+        }
+        per_query = pd.DataFrame({
+            'query_id': [g['id'] for g in gold_queries],
+            'query': [g['query'] for g in gold_queries],
+            **metrics
+        })
+
+        return {
+            'num_queries': len(gold_queries),
+            'recomputed_queries': self.recomputed,
+            'summary': summary,
+            'per_query': per_query
+        }
+
+
+if __name__ == "__main__":
+    gold_path = sys.argv[1] if len(sys.argv) > 1 else config.EVALUATION_GOLD_PATH
+    gold_queries = load_gold_queries(gold_path)
+    harness = EvaluationHarness(CausalReasoningEngine())
+    report = harness.evaluate(gold_queries)
+
+    output_path = os.path.join(config.OUTPUTS_DIR, 'evaluation_metrics.csv')
+    report['per_query'].to_csv(output_path, index=False)
+
+    print("=" * 60)
+    print("EVALUATION SUMMARY")
+    print("=" * 60)
+    print(f"Queries: {report['num_queries']} "
+          f"(re-scored: {report['recomputed_queries']})")
+    for name, value in report['summary'].items():
+        print(f"  {name}: {value}")
+    print(f"\nPer-query metrics → {output_path}")
+    print("=" * 60)
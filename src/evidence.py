@@ -0,0 +1,47 @@
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+
+def evidence_ref(
+    transcript_id: str,
+    turn_id: int,
+    span: Tuple[int, int]
+) -> Dict:
+    return {
+        "transcript_id": transcript_id,
+        "turn_id": turn_id,
+        "span": span
+    }
+
+
+def resolve_evidence(dataset, ref: Dict) -> Optional[Dict]:
+    if "text" in ref:
+        return ref
+    if dataset is None:
+        return None
+
+    conv = dataset.get_conversation(ref["transcript_id"])
+    if conv is None:
+        return None
+
+    turns = conv["conversation"]
+    turn_id = ref["turn_id"]
+    if not 0 <= turn_id < len(turns):
+        return None
+
+    turn = turns[turn_id]
+    text = turn["text"]
+    start, end = ref.get("span") or (0, len(text))
+
+    return {
+        **ref,
+        "speaker": turn["speaker"],
+        "text": text,
+        "matched_text": text[start:end]
+    }
+
+
+def iter_resolved_evidence(dataset, refs: Iterable[Dict]) -> Iterator[Dict]:
+    for ref in refs:
+        resolved = resolve_evidence(dataset, ref)
+        if resolved is not None:
+            yield resolved
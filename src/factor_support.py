@@ -0,0 +1,335 @@
+import os
+import pickle
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+import config
+from causal_patterns import extract_causal_explanation, pattern_version
+from text_pipeline import speaker_role
+from transcript_store import TranscriptView
+
+NO_OUTCOME = "NONE"
+
+
+class FactorSupportTable:
+    def __init__(self):
+        self.intent_to_outcome = {
+            intent: outcome
+            for outcome, intents in config.OUTCOME_MAPPING.items()
+            for intent in intents
+        }
+        self.transcript_outcome: Dict[str, str] = {}
+        self.transcript_factors: Dict[str, Dict[str, int]] = {}
+        self.postings: Dict[str, set] = defaultdict(set)
+        self.transcript_speaker_factors: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self.speaker_postings: Dict[str, Dict[str, set]] = defaultdict(lambda: defaultdict(set))
+
+        self.outcome_conversations: Dict[str, int] = defaultdict(int)
+        self.support: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.evidence_totals: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.factor_conversations: Dict[str, int] = defaultdict(int)
+        self.version = None
+
+    @classmethod
+    def load_or_build(cls, dataset, cache_path: Optional[str] = None) -> "FactorSupportTable":
+        if cache_path is None:
+            cache_path = os.path.join(config.CACHE_DIR, "factor_support.pkl")
+        version = (dataset.fingerprint, pattern_version())
+
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, "rb") as f:
+                    table = pickle.load(f)
+                if table.version == version:
+                    return table
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+                pass
+
+        table = cls()
+        text_pipeline = dataset.text_pipeline
+        for index in dataset.store.live_indices():
+            table.add_transcript(
+                TranscriptView(dataset.store, index),
+                normalized_turns=text_pipeline.normalized_turns(index)
+            )
+        table.version = version
+        table.save(cache_path)
+        return table
+
+    def save(self, cache_path: str):
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["postings"] = dict(self.postings)
+        state["speaker_postings"] = {s: dict(f) for s, f in self.speaker_postings.items()}
+        state["outcome_conversations"] = dict(self.outcome_conversations)
+        state["support"] = {o: dict(f) for o, f in self.support.items()}
+        state["evidence_totals"] = {o: dict(f) for o, f in self.evidence_totals.items()}
+        state["factor_conversations"] = dict(self.factor_conversations)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.postings = defaultdict(set, state["postings"])
+        self.speaker_postings = defaultdict(lambda: defaultdict(set), {
+            s: defaultdict(set, f) for s, f in state["speaker_postings"].items()
+        })
+        self.outcome_conversations = defaultdict(int, state["outcome_conversations"])
+        self.support = defaultdict(lambda: defaultdict(int), {
+            o: defaultdict(int, f) for o, f in state["support"].items()
+        })
+        self.evidence_totals = defaultdict(lambda: defaultdict(int), {
+            o: defaultdict(int, f) for o, f in state["evidence_totals"].items()
+        })
+        self.factor_conversations = defaultdict(int, state["factor_conversations"])
+
+    def add_transcripts(self, conversations: Iterable[Dict]):
+        for conv in conversations:
+            self.add_transcript(conv)
+
+    def add_transcript(self, conv: Dict, normalized_turns: Optional[List[str]] = None):
+        transcript_id = conv["transcript_id"]
+        if transcript_id in self.transcript_factors:
+            self.remove_transcript(transcript_id)
+
+        outcome = self.intent_to_outcome.get(conv["intent"], NO_OUTCOME)
+        explanation = extract_causal_explanation(
+            conversation=conv["conversation"],
+            outcome=outcome,
+            transcript_id=transcript_id,
+            normalized_turns=normalized_turns
+        )
+        factors = {
+            f["factor"]: len(f["evidence_turns"])
+            for f in explanation["causal_factors"]
+        }
+        turns = conv["conversation"]
+        speaker_factors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        for f in explanation["causal_factors"]:
+            for ref in f["evidence_turns"]:
+                role = speaker_role(turns[ref["turn_id"]]["speaker"])
+                speaker_factors[role][f["factor"]] += 1
+
+        self.transcript_outcome[transcript_id] = outcome
+        self.transcript_factors[transcript_id] = factors
+        self.transcript_speaker_factors[transcript_id] = {
+            role: dict(counts) for role, counts in speaker_factors.items()
+        }
+        for role, counts in speaker_factors.items():
+            for factor in counts:
+                self.speaker_postings[role][factor].add(transcript_id)
+        self.outcome_conversations[outcome] += 1
+        for factor, evidence_count in factors.items():
+            self.postings[factor].add(transcript_id)
+            self.support[outcome][factor] += 1
+            self.evidence_totals[outcome][factor] += evidence_count
+            self.factor_conversations[factor] += 1
+
+    def remove_transcripts(self, transcript_ids: Iterable[str]):
+        for transcript_id in transcript_ids:
+            self.remove_transcript(transcript_id)
+
+    def remove_transcript(self, transcript_id: str):
+        factors = self.transcript_factors.pop(transcript_id, None)
+        if factors is None:
+            return
+        outcome = self.transcript_outcome.pop(transcript_id)
+        speaker_factors = self.transcript_speaker_factors.pop(transcript_id, {})
+        for role, counts in speaker_factors.items():
+            for factor in counts:
+                self.speaker_postings[role][factor].discard(transcript_id)
+        self.outcome_conversations[outcome] -= 1
+        for factor, evidence_count in factors.items():
+            self.postings[factor].discard(transcript_id)
+            self.support[outcome][factor] -= 1
+            self.evidence_totals[outcome][factor] -= evidence_count
+            self.factor_conversations[factor] -= 1
+
+    def factors_for_transcript(
+        self,
+        transcript_id: str,
+        speaker: Optional[str] = None
+    ) -> Dict[str, int]:
+        if speaker is None:
+            return self.transcript_factors.get(transcript_id, {})
+        return self.transcript_speaker_factors.get(transcript_id, {}).get(speaker, {})
+
+    def factor_transcripts(self, factor: str, speaker: Optional[str] = None) -> set:
+        if speaker is None:
+            return self.postings.get(factor, set())
+        return self.speaker_postings.get(speaker, {}).get(factor, set())
+
+    def outcome_for_transcript(self, transcript_id: str) -> Optional[str]:
+        return self.transcript_outcome.get(transcript_id)
+
+    def transcript_count(self) -> int:
+        return len(self.transcript_factors)
+
+    def export_arrays(self, store) -> Tuple[Dict[str, np.ndarray], Dict]:
+        factors = sorted(set(self.postings) | set(self.factor_conversations))
+        outcomes = sorted(set(self.outcome_conversations) | set(self.transcript_outcome.values()))
+        speakers = sorted(self.speaker_postings)
+        factor_codes = {factor: code for code, factor in enumerate(factors)}
+        outcome_codes = {outcome: code for code, outcome in enumerate(outcomes)}
+
+        live = [
+            (index, tid) for index, tid in enumerate(store.transcript_ids)
+            if store.id_to_index.get(tid) == index
+        ]
+        transcript_outcomes = np.full(len(store.transcript_ids), -1, dtype=np.int16)
+        for index, tid in live:
+            if tid in self.transcript_outcome:
+                transcript_outcomes[index] = outcome_codes[self.transcript_outcome[tid]]
+
+        arrays = {"outcomes": transcript_outcomes}
+        for scope in [None] + speakers:
+            prefix = "all" if scope is None else scope
+            counts = np.zeros(len(store.transcript_ids), dtype=np.int64)
+            codes, values = [], []
+            for index, tid in live:
+                transcript_factors = self.factors_for_transcript(tid, scope)
+                counts[index] = len(transcript_factors)
+                codes.extend(factor_codes[f] for f in transcript_factors)
+                values.extend(transcript_factors.values())
+
+            postings = [
+                sorted(store.id_to_index[tid] for tid in self.factor_transcripts(f, scope))
+                for f in factors
+            ]
+            arrays.update({
+                f"{prefix}.factor_indptr": np.concatenate(([0], np.cumsum(counts))),
+                f"{prefix}.factor_codes": np.asarray(codes, dtype=np.int16),
+                f"{prefix}.factor_counts": np.asarray(values, dtype=np.int32),
+                f"{prefix}.posting_indptr": np.concatenate(
+                    ([0], np.cumsum([len(p) for p in postings]))
+                ).astype(np.int64),
+                f"{prefix}.posting_indices": np.asarray(
+                    [i for p in postings for i in p], dtype=np.int64
+                )
+            })
+
+        metadata = {
+            "factors": factors,
+            "outcomes": outcomes,
+            "speakers": speakers,
+            "transcripts": self.transcript_count(),
+            "outcome_conversations": dict(self.outcome_conversations),
+            "support": {o: dict(f) for o, f in self.support.items()},
+            "evidence_totals": {o: dict(f) for o, f in self.evidence_totals.items()},
+            "factor_conversations": dict(self.factor_conversations),
+            "version": self.version
+        }
+        return arrays, metadata
+
+    def lookup(self, outcome: str, factor: str) -> Dict:
+        conversations = self.outcome_conversations.get(outcome, 0)
+        support = self.support.get(outcome, {}).get(factor, 0)
+        evidence_total = self.evidence_totals.get(outcome, {}).get(factor, 0)
+        total_conversations = self.transcript_count()
+
+        support_rate = support / conversations if conversations else 0.0
+        base_rate = (
+            self.factor_conversations.get(factor, 0) / total_conversations
+            if total_conversations else 0.0
+        )
+
+        return {
+            "outcome": outcome,
+            "factor": factor,
+            "supporting_conversations": support,
+            "outcome_conversations": conversations,
+            "support_rate": round(support_rate, 4),
+            "lift": round(support_rate / base_rate, 3) if base_rate else 0.0,
+            "evidence_total": evidence_total,
+            "avg_evidence_per_conversation": (
+                round(evidence_total / support, 3) if support else 0.0
+            )
+        }
+
+    def factors_for_outcome(self, outcome: str) -> List[Dict]:
+        return sorted(
+            (self.lookup(outcome, factor) for factor in self.support.get(outcome, {})),
+            key=lambda x: x["supporting_conversations"],
+            reverse=True
+        )
+
+
+class FrozenSupportTable(FactorSupportTable):
+    def __init__(self, store, arrays: Dict[str, np.ndarray], metadata: Dict):
+        self.store = store
+        self.arrays = arrays
+        self.factors = metadata["factors"]
+        self.factor_codes = {factor: code for code, factor in enumerate(self.factors)}
+        self.outcomes = metadata["outcomes"]
+        self.speakers = set(metadata["speakers"])
+        self.num_transcripts = metadata["transcripts"]
+        self.intent_to_outcome = {
+            intent: outcome
+            for outcome, intents in config.OUTCOME_MAPPING.items()
+            for intent in intents
+        }
+        self.outcome_conversations = metadata["outcome_conversations"]
+        self.support = metadata["support"]
+        self.evidence_totals = metadata["evidence_totals"]
+        self.factor_conversations = metadata["factor_conversations"]
+        self.version = metadata["version"]
+
+    def _scope(self, speaker: Optional[str]) -> Optional[str]:
+        if speaker is None:
+            return "all"
+        return speaker if speaker in self.speakers else None
+
+    def factors_for_transcript(
+        self,
+        transcript_id: str,
+        speaker: Optional[str] = None
+    ) -> Dict[str, int]:
+        index = self.store.id_to_index.get(transcript_id)
+        prefix = self._scope(speaker)
+        if index is None or prefix is None:
+            return {}
+        indptr = self.arrays[f"{prefix}.factor_indptr"]
+        start, stop = int(indptr[index]), int(indptr[index + 1])
+        return {
+            self.factors[code]: int(count)
+            for code, count in zip(
+                self.arrays[f"{prefix}.factor_codes"][start:stop],
+                self.arrays[f"{prefix}.factor_counts"][start:stop]
+            )
+        }
+
+    def factor_transcripts(self, factor: str, speaker: Optional[str] = None) -> set:
+        code = self.factor_codes.get(factor)
+        prefix = self._scope(speaker)
+        if code is None or prefix is None:
+            return set()
+        indptr = self.arrays[f"{prefix}.posting_indptr"]
+        transcript_ids = self.store.transcript_ids
+        return {
+            transcript_ids[index]
+            for index in self.arrays[f"{prefix}.posting_indices"][indptr[code]:indptr[code + 1]]
+        }
+
+    def outcome_for_transcript(self, transcript_id: str) -> Optional[str]:
+        index = self.store.id_to_index.get(transcript_id)
+        if index is None:
+            return None
+        code = int(self.arrays["outcomes"][index])
+        return self.outcomes[code] if code >= 0 else None
+
+    def transcript_count(self) -> int:
+        return self.num_transcripts
+
+    def add_transcript(self, conv: Dict, normalized_turns: Optional[List[str]] = None):
+        raise RuntimeError("Support table is attached to shared segments and is read-only")
+
+    def remove_transcript(self, transcript_id: str):
+        raise RuntimeError("Support table is attached to shared segments and is read-only")
+
+    def save(self, cache_path: str):
+        raise RuntimeError("Support table is attached to shared segments and is read-only")
@@ -41,8 +41,7 @@ class FinalCausalExplainer:
                     "transcript_id": call["transcript_id"],
                     "factor": factor["factor"],
                     "turn_id": turn["turn_id"],
-                    "speaker": turn["speaker"],
-                    "text": turn["text"]
+                    "span": turn["span"]
                 })
         return {
             "query": reasoning_output.get("query"),
@@ -0,0 +1,285 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+
+import config
+from evaluation import load_gold_queries
+from reasoning_engine import CausalReasoningEngine
+
+FUSION_METHODS = ("linear", "normalized", "rrf")
+
+
+class FusionScoreCache:
+    def __init__(self, engine: CausalReasoningEngine, candidates: int = None):
+        self.engine = engine
+        self.candidates = (
+            config.FUSION_SWEEP_CANDIDATES if candidates is None else candidates
+        )
+
+    def _cache_path(self, queries: List[str]) -> str:
+        payload = json.dumps([
+            list(self.engine.retriever.index_version),
+            self.candidates,
+            queries
+        ], default=str)
+        key = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(config.CACHE_DIR, f"fusion_scores_{key}.npz")
+
+    def load(self, queries: List[str]) -> Dict[str, np.ndarray]:
+        path = self._cache_path(queries)
+        if os.path.exists(path):
+            with np.load(path, allow_pickle=False) as cached:
+                return {name: cached[name] for name in cached.files}
+
+        semantic, keyword, row_ids = self.engine.retriever.score_matrices(queries)
+        matrices = self._candidate_pool(semantic, keyword)
+        matrices['transcript_ids'] = np.asarray(row_ids)[matrices['pool']]
+
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(tmp_path, **matrices)
+        os.replace(tmp_path, path)
+        return matrices
+
+    def _candidate_pool(
+        self,
+        semantic: np.ndarray,
+        keyword: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        num_docs = semantic.shape[1]
+        depth = min(self.candidates, num_docs)
+
+        semantic_top = np.argpartition(-semantic, depth - 1, axis=1)[:, :depth]
+        keyword_top = np.argpartition(-keyword, depth - 1, axis=1)[:, :depth]
+        union = np.concatenate([semantic_top, keyword_top], axis=1)
+        union.sort(axis=1)
+        duplicate = np.zeros_like(union, dtype=bool)
+        duplicate[:, 1:] = union[:, 1:] == union[:, :-1]
+        pool = np.where(duplicate, -1, union)
+        pool = -np.sort(-pool, axis=1)[:, :np.max((~duplicate).sum(axis=1))]
+
+        valid = pool >= 0
+        safe_pool = np.where(valid, pool, 0)
+        pool_semantic = np.take_along_axis(semantic, safe_pool, axis=1)
+        pool_keyword = np.take_along_axis(keyword, safe_pool, axis=1)
+
+        return {
+            'pool': safe_pool,
+            'valid': valid,
+            'semantic': np.where(valid, pool_semantic, -np.inf),
+            'keyword': np.where(valid, pool_keyword, -np.inf),
+            'semantic_rank': self._corpus_ranks(semantic, pool_semantic),
+            'keyword_rank': self._corpus_ranks(keyword, pool_keyword)
+        }
+
+    def _corpus_ranks(self, scores: np.ndarray, values: np.ndarray) -> np.ndarray:
+        ordered = -np.sort(-scores, axis=1)
+        return np.stack([
+            np.searchsorted(-ordered[i], -values[i], side='left') + 1
+            for i in range(scores.shape[0])
+        ])
+
+
+def default_settings(
+    weights: np.ndarray = None,
+    rrf_constants: Tuple[int, ...] = (10, 30, 60, 100)
+) -> List[Dict]:
+    if weights is None:
+        weights = np.round(np.linspace(0.0, 1.0, 41), 3)
+    settings = []
+    for method in ("linear", "normalized"):
+        for w in weights:
+            settings.append({
+                'method': method,
+                'semantic_weight': float(w),
+                'keyword_weight': round(1.0 - float(w), 3),
+                'rrf_k': None
+            })
+    for rrf_k in rrf_constants:
+        for w in weights:
+            settings.append({
+                'method': 'rrf',
+                'semantic_weight': float(w),
+                'keyword_weight': round(1.0 - float(w), 3),
+                'rrf_k': rrf_k
+            })
+    return settings
+
+
+def _minmax(scores: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    low = np.where(valid, scores, np.inf).min(axis=1, keepdims=True)
+    high = np.where(valid, scores, -np.inf).max(axis=1, keepdims=True)
+    span = np.where(high > low, high - low, 1.0)
+    return np.where(valid, (scores - low) / span, 0.0)
+
+
+def fuse_scores(matrices: Dict[str, np.ndarray], settings: List[Dict]) -> np.ndarray:
+    valid = matrices['valid']
+    semantic_w = np.array([s['semantic_weight'] for s in settings])[:, None, None]
+    keyword_w = np.array([s['keyword_weight'] for s in settings])[:, None, None]
+    methods = np.array([s['method'] for s in settings])
+    rrf_k = np.array([s['rrf_k'] or 0 for s in settings], dtype=float)[:, None, None]
+
+    semantic = np.where(valid, matrices['semantic'], 0.0)
+    keyword = np.where(valid, matrices['keyword'], 0.0)
+    components = {
+        'linear': (semantic, keyword),
+        'normalized': (_minmax(semantic, valid), _minmax(keyword, valid)),
+        'rrf': None
+    }
+
+    fused = np.empty((len(settings),) + valid.shape)
+    for method in FUSION_METHODS:
+        selected = methods == method
+        if not selected.any():
+            continue
+        if method == 'rrf':
+            fused[selected] = (
+                semantic_w[selected] / (rrf_k[selected] + matrices['semantic_rank'])
+                + keyword_w[selected] / (rrf_k[selected] + matrices['keyword_rank'])
+            )
+        else:
+            sem, kw = components[method]
+            fused[selected] = semantic_w[selected] * sem + keyword_w[selected] * kw
+    return np.where(valid, fused, -np.inf)
+
+
+def ranking_metrics(
+    fused: np.ndarray,
+    relevant: np.ndarray,
+    labelled: np.ndarray,
+    k: int
+) -> Dict[str, np.ndarray]:
+    depth = min(k, fused.shape[2])
+    top = np.argpartition(-fused, depth - 1, axis=2)[:, :, :depth]
+    top_scores = np.take_along_axis(fused, top, axis=2)
+    top = np.take_along_axis(top, np.argsort(-top_scores, axis=2, kind='stable'), axis=2)
+
+    hits = np.take_along_axis(
+        np.broadcast_to(relevant, fused.shape), top, axis=2
+    )
+    num_relevant = relevant.sum(axis=1)
+    first_hit = hits.argmax(axis=2)
+    reciprocal_rank = np.where(hits.any(axis=2), 1.0 / (first_hit + 1), 0.0)
+
+    discounts = 1.0 / np.log2(np.arange(2, depth + 2))
+    dcg = (hits * discounts).sum(axis=2)
+    ideal = np.array([discounts[:min(n, depth)].sum() for n in num_relevant])
+    ndcg = np.divide(dcg, ideal, out=np.zeros_like(dcg), where=ideal > 0)
+
+    def labelled_mean(values: np.ndarray) -> np.ndarray:
+        return values[:, labelled].mean(axis=1) if labelled.any() else np.full(len(values), np.nan)
+
+    gold_total = np.maximum(num_relevant, 1)
+    return {
+        f'recall@{k}': labelled_mean(hits.sum(axis=2) / gold_total),
+        f'precision@{k}': labelled_mean(hits.sum(axis=2) / depth),
+        'mrr': labelled_mean(reciprocal_rank),
+        f'ndcg@{k}': labelled_mean(ndcg)
+    }
+
+
+def _relevance(
+    engine: CausalReasoningEngine,
+    matrices: Dict[str, np.ndarray],
+    gold_queries: List[Dict]
+) -> Tuple[np.ndarray, np.ndarray]:
+    dataset = engine.dataset
+    store = dataset.store
+    gold_sets = []
+    for item in gold_queries:
+        gold = set()
+        for tid in item['gold_transcript_ids']:
+            index = store.id_to_index.get(tid)
+            representative = dataset.representative(index) if index is not None else None
+            gold.add(store.transcript_ids[representative] if representative is not None else tid)
+        gold_sets.append(gold)
+
+    relevant = np.array([
+        [tid in gold for tid in row]
+        for row, gold in zip(matrices['transcript_ids'], gold_sets)
+    ]) & matrices['valid']
+    labelled = np.array([bool(gold) for gold in gold_sets])
+    return relevant, labelled
+
+
+def run_sweep(
+    engine: CausalReasoningEngine,
+    gold_queries: List[Dict],
+    settings: List[Dict] = None,
+    k: int = None,
+    candidates: int = None
+) -> Dict:
+    if settings is None:
+        settings = default_settings()
+    if k is None:
+        k = config.EVALUATION_K
+
+    started = time.perf_counter()
+    matrices = FusionScoreCache(engine, candidates).load(
+        [item['query'] for item in gold_queries]
+    )
+    scored = time.perf_counter()
+
+    relevant, labelled = _relevance(engine, matrices, gold_queries)
+    fused = fuse_scores(matrices, settings)
+    metrics = ranking_metrics(fused, relevant, labelled, k)
+
+    results = pd.DataFrame(settings)
+    for name, values in metrics.items():
+        results[name] = np.round(values, 4)
+    results = results.sort_values(
+        ['mrr', f'ndcg@{k}', f'recall@{k}'], ascending=False
+    ).reset_index(drop=True)
+
+    return {
+        'num_queries': len(gold_queries),
+        'labelled_queries': int(labelled.sum()),
+        'num_settings': len(settings),
+        'score_seconds': round(scored - started, 3),
+        'sweep_seconds': round(time.perf_counter() - scored, 3),
+        'results': results
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep hybrid fusion weights offline")
+    parser.add_argument("gold_path", nargs="?", default=config.EVALUATION_GOLD_PATH)
+    parser.add_argument("--k", type=int, default=config.EVALUATION_K)
+    parser.add_argument("--candidates", type=int, default=config.FUSION_SWEEP_CANDIDATES)
+    args = parser.parse_args()
+
+    engine = CausalReasoningEngine()
+    report = run_sweep(
+        engine,
+        load_gold_queries(args.gold_path),
+        k=args.k,
+        candidates=args.candidates
+    )
+
+    output_path = os.path.join(config.OUTPUTS_DIR, 'fusion_sweep.csv')
+    report['results'].to_csv(output_path, index=False)
+
+    results = report['results']
+    current = results[
+        (results['method'] == 'linear')
+        & np.isclose(results['semantic_weight'], config.SEMANTIC_WEIGHT)
+    ]
+
+    print("=" * 60)
+    print("FUSION WEIGHT SWEEP")
+    print("=" * 60)
+    print(f"Queries: {report['num_queries']} (labelled: {report['labelled_queries']})")
+    print(f"Settings: {report['num_settings']}")
+    print(f"Score matrices: {report['score_seconds']}s, sweep: {report['sweep_seconds']}s")
+    print("\nTop settings:")
+    print(results.head(10).to_string(index=False))
+    if len(current):
+        print("\nCurrent config (linear):")
+        print(current.head(1).to_string(index=False))
+    print(f"\nAll settings → {output_path}")
+    print("=" * 60)
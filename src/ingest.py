@@ -0,0 +1,131 @@
+import io
+import gzip
+import json
+from typing import Dict, Iterator, TextIO
+
+CHUNK_SIZE = 1 << 20
+COMPRESSION_SUFFIXES = (".gz", ".zst", ".zstd")
+WHITESPACE = " \t\n\r"
+
+_decoder = json.JSONDecoder()
+
+
+def open_transcript_source(path: str) -> TextIO:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.endswith((".zst", ".zstd")):
+        try:
+            import zstandard
+        except ImportError as error:
+            raise ImportError(
+                "Reading zstd-compressed transcript dumps requires the "
+                "'zstandard' package (pip install zstandard)"
+            ) from error
+        raw = open(path, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def _base_path(path: str) -> str:
+    for suffix in COMPRESSION_SUFFIXES:
+        if path.endswith(suffix):
+            return path[:-len(suffix)]
+    return path
+
+
+def iter_transcripts(path: str) -> Iterator[Dict]:
+    with open_transcript_source(path) as stream:
+        if _base_path(path).endswith(".jsonl"):
+            for line in stream:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield from _StreamingJsonReader(stream).iter_transcripts()
+
+
+class _StreamingJsonReader:
+    def __init__(self, stream: TextIO, chunk_size: int = CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str):
+        if self._peek() != char:
+            raise ValueError(
+                f"Malformed transcript dump: expected '{char}' near offset {self.pos}"
+            )
+        self.pos += 1
+
+    def _decode_value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            if not self._fill():
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                self.pos = end
+                return value
+
+    def _iter_array(self) -> Iterator:
+        self._expect("[")
+        if self._peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self._decode_value()
+            separator = self._peek()
+            self.pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(
+                    f"Malformed transcript dump: unexpected '{separator}' in array"
+                )
+
+    def iter_transcripts(self) -> Iterator[Dict]:
+        head = self._peek()
+        if head == "[":
+            yield from self._iter_array()
+            return
+
+        self._expect("{")
+        while self._peek() != "}":
+            key = self._decode_value()
+            self._expect(":")
+            if key == "transcripts":
+                yield from self._iter_array()
+            else:
+                self._decode_value()
+            if self._peek() == ",":
+                self.pos += 1
+        self.pos += 1
@@ -1,10 +1,24 @@
 from typing import Dict, List
-from collections import defaultdict
+
+import config
+from factor_support import FactorSupportTable
 
 
 class OutcomeValidator:
-    def __init__(self, min_support: int = 2):
-        self.min_support = min_support
+    def __init__(
+        self,
+        support_table: FactorSupportTable,
+        min_support: int = None,
+        min_support_rate: float = None
+    ):
+        self.support_table = support_table
+        self.min_support = (
+            config.VALIDATION_MIN_SUPPORT if min_support is None else min_support
+        )
+        self.min_support_rate = (
+            config.VALIDATION_MIN_SUPPORT_RATE
+            if min_support_rate is None else min_support_rate
+        )
 
     def validate(
         self,
@@ -12,30 +26,30 @@ class OutcomeValidator:
         outcome: str,
         step6_output: Dict
     ) -> Dict:
-        supporting_calls = step6_output.get("supporting_calls", [])
+        global_factors = step6_output.get(
+            "global_causal_explanation", {}
+        ).get("global_causal_factors", [])
 
-        if len(supporting_calls) < self.min_support:
+        if not global_factors:
             return self._no_outcome_response(query, outcome)
 
-        escalation_types = defaultdict(int)
-        evidence_map = defaultdict(list)
+        identified_types = []
+        for factor in global_factors:
+            stats = self.support_table.lookup(outcome, factor["factor"])
+            if stats["supporting_conversations"] < self.min_support:
+                continue
+            if stats["support_rate"] < self.min_support_rate:
+                continue
 
-        for call in supporting_calls:
-            for factor in call["causal_explanation"]["causal_factors"]:
-                escalation_types[factor["factor"]] += 1
-                evidence_map[factor["factor"]].extend(
-                    factor["evidence_turns"]
+            identified_types.append({
+                "escalation_type": factor["factor"],
+                "supporting_calls": stats["supporting_conversations"],
+                "support_rate": stats["support_rate"],
+                "lift": stats["lift"],
+                "sample_evidence": self._sample_evidence(
+                    step6_output, factor["factor"]
                 )
-
-        identified_types = [
-            {
-                "escalation_type": factor,
-                "supporting_calls": count,
-                "sample_evidence": evidence_map[factor][:2]
-            }
-            for factor, count in escalation_types.items()
-            if count >= self.min_support
-        ]
+            })
 
         if not identified_types:
             return self._no_outcome_response(query, outcome)
@@ -47,10 +61,22 @@ class OutcomeValidator:
             "escalation_types": identified_types,
             "justification": (
                 f"The query implies {outcome} based on recurring "
-                f"dialogue patterns observed across multiple conversations."
+                f"dialogue patterns observed across "
+                f"{max(t['supporting_calls'] for t in identified_types)} "
+                f"{outcome} conversations in the corpus."
             )
         }
 
+    def _sample_evidence(self, step6_output: Dict, factor_name: str) -> List[Dict]:
+        samples = []
+        for call in step6_output.get("supporting_calls", []):
+            for factor in call["causal_explanation"]["causal_factors"]:
+                if factor["factor"] == factor_name:
+                    samples.extend(factor["evidence_turns"][:2 - len(samples)])
+            if len(samples) >= 2:
+                break
+        return samples
+
     def _no_outcome_response(self, query: str, outcome: str) -> Dict:
         return {
             "query": query,
@@ -1,5 +1,36 @@
+import re
 from typing import Dict, Optional
 
+SPEAKER_TERMS = {
+    "customer": r"(?:customer|caller|client)s?",
+    "agent": r"(?:agent|representative|rep|advisor)s?"
+}
+
+SPEAKER_ACTIONS = (
+    r"(?:said|says|say|mention\w*|ask\w*|threaten\w*|complain\w*|request\w*"
+    r"|demand\w*|express\w*|state\w*|refus\w*|offer\w*|promis\w*|apologi\w*"
+    r"|explain\w*|admit\w*|fail\w*|(?:was |were )?unable|could not|couldn't"
+    r"|did not|didn't)"
+)
+
+SPEAKER_FOCUS_PATTERNS = {
+    role: [
+        re.compile(rf"\b(?:by|from) (?:the |a )?{term}\b"),
+        re.compile(rf"\b(?:the )?{term} {SPEAKER_ACTIONS}\b"),
+        re.compile(rf"\b{term}(?:'s|s') (?:side|turns|words|statements)\b")
+    ]
+    for role, term in SPEAKER_TERMS.items()
+}
+
+
+def detect_speaker_focus(query: str) -> Optional[str]:
+    query = query.lower()
+    focused = [
+        role for role, patterns in SPEAKER_FOCUS_PATTERNS.items()
+        if any(pattern.search(query) for pattern in patterns)
+    ]
+    return focused[0] if len(focused) == 1 else None
+
 
 class QueryInterpreter:
     FOLLOW_UP_KEYWORDS = {
@@ -61,6 +92,7 @@ class QueryInterpreter:
             "requires_context": previous_context is not None
             and query_type != "NEW_CAUSAL_QUERY",
             "focus_outcome": self._infer_outcome(normalized_query),
+            "speaker_focus": detect_speaker_focus(normalized_query),
         }
     def _detect_query_type(
         self,
@@ -0,0 +1,199 @@
+import os
+import re
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import config
+from background_loader import BackgroundLoader
+from result_cache import normalize_query
+
+ANONYMIZE_PATTERNS = (
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+"), "<email>"),
+    (re.compile(r"\+?\d[\d\s().-]{6,}\d"), "<number>"),
+    (re.compile(r"\b[\w-]*\d[\w-]*\b"), "<id>")
+)
+PLACEHOLDERS = ("<email>", "<number>", "<id>")
+MAX_WARMUP_HISTORY = 50
+
+QueryKey = Tuple[str, str, int]
+
+
+def anonymize_query(query: str) -> str:
+    text = normalize_query(query)
+    for pattern, placeholder in ANONYMIZE_PATTERNS:
+        text = pattern.sub(placeholder, text)
+    return text
+
+
+class QueryLog:
+    def __init__(self, path: Optional[str] = None, max_entries: int = None):
+        self.path = (
+            os.path.join(config.CACHE_DIR, "query_log.json") if path is None else path
+        )
+        self.max_entries = (
+            config.QUERY_LOG_MAX_ENTRIES if max_entries is None else max_entries
+        )
+        self.counts: Dict[QueryKey, int] = {}
+        self.last_seen: Dict[QueryKey, float] = {}
+        self.warmups: List[Dict] = []
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            self._load()
+
+    def key(self, query: str, outcome: str, top_k: int) -> QueryKey:
+        return (anonymize_query(query), outcome, top_k)
+
+    def record(self, query: str, outcome: str, top_k: int) -> QueryKey:
+        key = self.key(query, outcome, top_k)
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self.last_seen[key] = time.time()
+            if len(self.counts) > self.max_entries:
+                self._trim()
+        return key
+
+    def _trim(self):
+        keep = sorted(
+            self.counts,
+            key=lambda k: (self.counts[k], self.last_seen.get(k, 0.0)),
+            reverse=True
+        )[:self.max_entries]
+        self.counts = {k: self.counts[k] for k in keep}
+        self.last_seen = {k: self.last_seen[k] for k in keep if k in self.last_seen}
+
+    def top(self, n: int) -> List[Tuple[QueryKey, int]]:
+        with self._lock:
+            entries = [
+                (key, count) for key, count in self.counts.items()
+                if not any(p in key[0] for p in PLACEHOLDERS)
+            ]
+        entries.sort(key=lambda e: (e[1], self.last_seen.get(e[0], 0.0)), reverse=True)
+        return entries[:n]
+
+    def record_warmup(self, summary: Dict):
+        with self._lock:
+            self.warmups = [
+                w for w in self.warmups if w["started_at"] != summary["started_at"]
+            ]
+            self.warmups.append(summary)
+            self.warmups = self.warmups[-MAX_WARMUP_HISTORY:]
+
+    def save(self):
+        with self._lock:
+            payload = {
+                "queries": [
+                    {
+                        "query": query,
+                        "outcome": outcome,
+                        "top_k": top_k,
+                        "count": count,
+                        "last_seen": self.last_seen.get((query, outcome, top_k))
+                    }
+                    for (query, outcome, top_k), count in self.counts.items()
+                ],
+                "warmups": list(self.warmups)
+            }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return
+        for entry in payload.get("queries", []):
+            key = (entry["query"], entry["outcome"], entry["top_k"])
+            self.counts[key] = entry["count"]
+            if entry.get("last_seen") is not None:
+                self.last_seen[key] = entry["last_seen"]
+        self.warmups = payload.get("warmups", [])
+
+
+class CacheWarmer:
+    def __init__(
+        self,
+        engine,
+        query_log: Optional[QueryLog] = None,
+        top_n: int = None,
+        window_s: float = None,
+        background: bool = True
+    ):
+        self.engine = engine
+        self.query_log = QueryLog() if query_log is None else query_log
+        self.top_n = config.WARMUP_TOP_N if top_n is None else top_n
+        self.window_s = (
+            config.WARMUP_COVERAGE_WINDOW_S if window_s is None else window_s
+        )
+        self.started_at = time.time()
+        self.warmed: set = set()
+        self.failed = 0
+        self.window_queries = 0
+        self.window_covered = 0
+        self._serving = 0
+        self._idle = threading.Condition()
+        self._query_lock = threading.Lock()
+        self.loader = BackgroundLoader(
+            self._warm, background=background, name="cache-warmup"
+        )
+
+    def _warm(self) -> int:
+        for (query, outcome, top_k), _ in self.query_log.top(self.top_n):
+            with self._idle:
+                self._idle.wait_for(lambda: self._serving == 0)
+            try:
+                with self._query_lock:
+                    self.engine.answer_query(query=query, outcome=outcome, top_k=top_k)
+            except Exception:
+                self.failed += 1
+                continue
+            self.warmed.add((query, outcome, top_k))
+        return len(self.warmed)
+
+    @contextmanager
+    def serving(self):
+        with self._idle:
+            self._serving += 1
+        try:
+            with self._query_lock:
+                yield
+        finally:
+            with self._idle:
+                self._serving -= 1
+                self._idle.notify_all()
+
+    def observe(self, query: str, outcome: str, top_k: int):
+        key = self.query_log.record(query, outcome, top_k)
+        if time.time() - self.started_at <= self.window_s:
+            self.window_queries += 1
+            if key in self.warmed:
+                self.window_covered += 1
+
+    def stats(self) -> Dict:
+        return {
+            "started_at": round(self.started_at, 3),
+            "top_n": self.top_n,
+            "warmed": len(self.warmed),
+            "failed": self.failed,
+            "ready": self.loader.ready(),
+            "warmup_seconds": (
+                round(self.loader.load_seconds, 3)
+                if self.loader.load_seconds is not None else None
+            ),
+            "window_s": self.window_s,
+            "window_queries": self.window_queries,
+            "window_covered": self.window_covered,
+            "coverage": (
+                round(self.window_covered / self.window_queries, 4)
+                if self.window_queries else 0.0
+            )
+        }
+
+    def save(self):
+        self.query_log.record_warmup(self.stats())
+        self.query_log.save()
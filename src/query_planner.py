@@ -0,0 +1,224 @@
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+from causal_patterns import CAUSAL_PATTERNS
+from data_loader import ConversationDataset
+from deadline import Deadline
+from factor_support import FactorSupportTable
+from result_cache import normalize_query
+from text_pipeline import STOP_WORDS, tokenize
+
+ACCESS_PATHS = ("factor_index", "lexical", "hybrid")
+
+
+class QueryPlanner:
+    def __init__(
+        self,
+        dataset: ConversationDataset,
+        support_table: FactorSupportTable
+    ):
+        self.dataset = dataset
+        self.support_table = support_table
+        self.factor_patterns = {
+            factor: [re.compile(p) for p in patterns]
+            for factor, patterns in CAUSAL_PATTERNS.items()
+        }
+
+    def named_factors(self, query: str) -> List[str]:
+        return self.factor_coverage(query)[0]
+
+    def factor_coverage(self, query: str) -> Tuple[List[str], List[str]]:
+        text = normalize_query(query)
+        covered = list(text)
+        factors = []
+        for factor, patterns in self.factor_patterns.items():
+            spans = [m.span() for p in patterns for m in p.finditer(text)]
+            name = factor.lower()
+            start = text.find(name)
+            if start >= 0:
+                spans.append((start, start + len(name)))
+            if not spans:
+                continue
+            factors.append(factor)
+            for start, end in spans:
+                covered[start:end] = " " * (end - start)
+        uncovered = [t for t in tokenize("".join(covered)) if t not in STOP_WORDS]
+        return factors, uncovered
+
+    def _estimate(self, retriever, stage: str, units: float = 1) -> float:
+        unit_cost = retriever.cost_model.unit_costs.get(
+            stage, config.PLANNER_COST_PRIORS[stage]
+        )
+        return unit_cost * units
+
+    def _factor_postings(
+        self,
+        factors: List[str],
+        speaker: Optional[str]
+    ) -> List[str]:
+        postings = [
+            self.support_table.factor_transcripts(factor, speaker)
+            for factor in factors
+        ]
+        matched = set.intersection(*postings) if postings else set()
+        id_to_index = self.dataset.store.id_to_index
+        return [
+            tid for tid in matched
+            if tid in id_to_index
+            and self.dataset.is_searchable(id_to_index[tid])
+        ]
+
+    def _lexical_selectivity(self, retriever, query: str) -> Dict:
+        vectorizer = retriever.tfidf
+        terms = [
+            t for t in vectorizer.build_analyzer()(normalize_query(query))
+            if " " not in t
+        ]
+        vocabulary = vectorizer.vocabulary_
+        known = [vocabulary[t] for t in terms if t in vocabulary]
+        documents = max(retriever.base_rows, 1)
+        document_frequency = (1 + documents) / np.exp(vectorizer.idf_[known] - 1) - 1
+        return {
+            "coverage": len(known) / len(terms) if terms else 0.0,
+            "selectivity": min(float(document_frequency.sum()) / documents, 1.0)
+        }
+
+    def plan(
+        self,
+        query: str,
+        outcome: str,
+        top_k: int,
+        speaker: Optional[str],
+        retriever,
+        deadline: Deadline
+    ) -> Dict:
+        rows = retriever.num_rows
+        searchable = max(rows - retriever.num_removed, 1)
+        store = self.dataset.store
+        avg_turns = store.total_turns / max(store.live_count, 1)
+        extract = self._estimate(retriever, "extract", avg_turns * top_k)
+        lexical_scan = self._estimate(retriever, "lexical_scan", rows)
+        encode = (
+            0.0 if retriever.has_query_embedding(query)
+            else self._estimate(retriever, "encode")
+        )
+
+        factors, uncovered = self.factor_coverage(query)
+        postings = (
+            self._factor_postings(factors, speaker) if factors and not uncovered else []
+        )
+        lookup_units = sum(
+            len(self.support_table.factor_transcripts(f, speaker)) for f in factors
+        )
+        lexical = self._lexical_selectivity(retriever, query)
+
+        candidates = [
+            {
+                "path": "factor_index",
+                "estimated_ms": (
+                    self._estimate(retriever, "factor_lookup", lookup_units) + extract
+                ),
+                "selectivity": len(postings) / searchable,
+                "adequate": bool(factors) and not uncovered and len(postings) >= top_k,
+                "detail": {
+                    "factors": factors,
+                    "uncovered_terms": uncovered,
+                    "postings": len(postings)
+                }
+            },
+            {
+                "path": "lexical",
+                "estimated_ms": lexical_scan + extract,
+                "selectivity": lexical["selectivity"],
+                "adequate": (
+                    lexical["coverage"] == 1.0
+                    and 0 < lexical["selectivity"] <= config.PLANNER_LEXICAL_MAX_SELECTIVITY
+                ),
+                "detail": {"term_coverage": round(lexical["coverage"], 3)}
+            },
+            {
+                "path": "hybrid",
+                "estimated_ms": (
+                    lexical_scan + encode
+                    + self._estimate(retriever, "semantic_scan", rows) + extract
+                ),
+                "selectivity": 1.0,
+                "adequate": True,
+                "detail": {"query_embedding_cached": encode == 0.0}
+            }
+        ]
+        for candidate in candidates:
+            candidate["estimated_ms"] = round(candidate["estimated_ms"], 3)
+            candidate["selectivity"] = round(candidate["selectivity"], 4)
+
+        chosen = min(
+            (c for c in candidates if c["adequate"]),
+            key=lambda c: (c["estimated_ms"], ACCESS_PATHS.index(c["path"]))
+        )
+        return {
+            "path": chosen["path"],
+            "estimated_ms": chosen["estimated_ms"],
+            "factors": factors,
+            "postings": postings,
+            "lookup_units": lookup_units,
+            "candidates": candidates,
+            "deadline_ms": deadline.budget_ms
+        }
+
+    def factor_search(
+        self,
+        plan: Dict,
+        top_k: int,
+        speaker: Optional[str],
+        retriever
+    ) -> List[Dict]:
+        started = time.perf_counter()
+        store = self.dataset.store
+        scored = []
+        for tid in plan["postings"]:
+            index = store.id_to_index[tid]
+            counts = self.support_table.factors_for_transcript(tid, speaker)
+            evidence = sum(counts.get(f, 0) for f in plan["factors"])
+            scored.append((evidence / max(store.num_turns[index], 1), -index, tid))
+        scored.sort(reverse=True)
+
+        results = [
+            {
+                "transcript_id": tid,
+                "cluster_size": self.dataset.cluster_size(-neg_index),
+                "score": float(score),
+                "semantic_score": 0.0,
+                "keyword_score": 0.0
+            }
+            for score, neg_index, tid in scored[:top_k]
+        ]
+        retriever.cost_model.observe(
+            "factor_lookup", (time.perf_counter() - started) * 1000, plan["lookup_units"]
+        )
+        return results
+
+
+def format_explain(plan: Dict) -> str:
+    lines = [
+        f"PLAN: {plan['path']}  (estimated {plan['estimated_ms']:.3f} ms"
+        + (f", actual {plan['actual_ms']:.3f} ms)" if "actual_ms" in plan else ")")
+    ]
+    if plan.get("factors"):
+        lines.append(f"  named factors: {', '.join(plan['factors'])}")
+    if plan.get("deadline_ms") is not None:
+        lines.append(f"  deadline: {plan['deadline_ms']} ms")
+    for candidate in plan["candidates"]:
+        marker = "*" if candidate["path"] == plan["path"] else " "
+        lines.append(
+            f" {marker} {candidate['path']:<13} est {candidate['estimated_ms']:>10.3f} ms"
+            f"  selectivity {candidate['selectivity']:<7}"
+            f"  {'adequate' if candidate['adequate'] else 'inadequate'}"
+            f"  {candidate['detail']}"
+        )
+    for stage, elapsed in plan.get("actual_stages", {}).items():
+        lines.append(f"  actual {stage}: {elapsed:.3f} ms")
+    return "\n".join(lines)
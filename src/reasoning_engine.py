@@ -1,56 +1,480 @@
-
-
-from typing import Dict
+import os
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+import config
+from background_loader import BackgroundLoader
 from data_loader import ConversationDataset
-from retriever import HybridRetriever
-from causal_patterns import extract_causal_explanation
+from retriever import HybridRetriever, StreamingDocumentEncoder
+from causal_patterns import extract_causal_explanation, pattern_version
 from causal_aggregator import aggregate_causal_explanations
+from semantic_cache import SemanticResultCache
+from result_cache import LRUCache, normalize_query
+from factor_support import FactorSupportTable
+from rollup_cube import RollupCube
+from transcript_store import TranscriptView
+from deadline import Deadline, DegradationMetrics
+from dense_search import BlockedDenseIndex
+from query_interpreter import detect_speaker_focus
+from query_planner import QueryPlanner
 
 
 class CausalReasoningEngine:
-    def __init__(self):
-        self.dataset = ConversationDataset()
-        self.retriever = HybridRetriever(self.dataset)
+    def __init__(
+        self,
+        verbose: bool = True,
+        dataset: Optional[ConversationDataset] = None,
+        retriever: Optional[HybridRetriever] = None,
+        support_table: Optional[FactorSupportTable] = None,
+        rollup_cube: Optional[RollupCube] = None,
+        speaker_retrievers: Optional[Dict[str, HybridRetriever]] = None
+    ):
+        self.speaker_loader = None
+        if dataset is None:
+            encoder = None
+            if config.STREAMING_INGEST:
+                encoder = StreamingDocumentEncoder(
+                    BlockedDenseIndex.create(config.DENSE_EMBEDDINGS_PATH)
+                    if config.DENSE_OUT_OF_CORE else None
+                )
+            dataset = ConversationDataset(
+                verbose=verbose,
+                on_batch=encoder.submit if encoder is not None else None
+            )
+            embedder, embeddings = (
+                encoder.finish() if encoder is not None else (None, None)
+            )
+            retriever = HybridRetriever(
+                dataset,
+                verbose=verbose,
+                embedder=embedder,
+                embeddings=embeddings
+            )
+        elif retriever is None:
+            retriever = HybridRetriever(dataset, verbose=verbose)
+        if speaker_retrievers is not None:
+            self.speaker_loader = BackgroundLoader(
+                lambda: speaker_retrievers,
+                background=False,
+                name="speaker-partitions"
+            )
+        elif config.SPEAKER_PARTITIONS:
+            self.speaker_loader = BackgroundLoader(
+                lambda: self._build_speaker_retrievers(dataset, retriever),
+                name="speaker-partitions"
+            )
+        self.dataset = dataset
+        self.retriever = retriever
+        self.support_table = (
+            FactorSupportTable.load_or_build(self.dataset)
+            if support_table is None else support_table
+        )
+        self.rollup_cube = (
+            RollupCube.build(self.dataset, self.support_table)
+            if rollup_cube is None else rollup_cube
+        )
+        self.planner = (
+            QueryPlanner(self.dataset, self.support_table)
+            if config.PLANNER_ENABLED else None
+        )
+        self.cost_model = self.retriever.cost_model
+        self.degradation_metrics = DegradationMetrics()
+        self.semantic_cache = None
+        if config.SEMANTIC_CACHE_ENABLED:
+            self.semantic_cache = SemanticResultCache(
+                dimension=self.retriever.embeddings.shape[1]
+            )
+        self.result_cache = LRUCache(
+            config.RESULT_CACHE_SIZE,
+            persist_path=(
+                os.path.join(config.CACHE_DIR, "result_cache.pkl")
+                if config.CACHE_PERSIST else None
+            )
+        )
+
+    def _build_speaker_retrievers(
+        self,
+        dataset: ConversationDataset,
+        retriever: HybridRetriever
+    ) -> Dict[str, HybridRetriever]:
+        return {
+            speaker: HybridRetriever(
+                dataset,
+                verbose=False,
+                embedder=retriever.embedder,
+                speaker=speaker
+            )
+            for speaker in config.SPEAKER_PARTITIONS
+        }
+
+    def speaker_retriever(
+        self,
+        speaker: Optional[str],
+        deadline: Optional[Deadline] = None,
+        degradations: Optional[List[str]] = None
+    ) -> HybridRetriever:
+        if speaker is None or self.speaker_loader is None:
+            return self.retriever
+        if (
+            not self.speaker_loader.ready()
+            and deadline is not None and deadline.enabled
+        ):
+            self._degrade(degradations, "full_index_speaker")
+            return self.retriever
+        return self.speaker_loader.get().get(speaker, self.retriever)
+
+    def _retrievers(self) -> List[HybridRetriever]:
+        retrievers = [self.retriever]
+        if self.speaker_loader is not None:
+            retrievers.extend(self.speaker_loader.get().values())
+        return retrievers
+
+    def cache_version(self):
+        return (self.dataset.fingerprint, pattern_version())
+
+    def _result_key(
+        self,
+        query: str,
+        outcome: str,
+        top_k: int,
+        speaker: Optional[str],
+        partition: Optional[str],
+        version
+    ):
+        return (
+            normalize_query(query),
+            outcome,
+            top_k,
+            speaker,
+            partition,
+            config.SEMANTIC_WEIGHT,
+            config.KEYWORD_WEIGHT,
+            config.DEDUP_ENABLED and config.DEDUP_THRESHOLD
+        ) + version
+
+    def add_transcripts(self, transcripts: Iterable[Dict]) -> List[int]:
+        retrievers = self._retrievers()
+        incoming = {t["transcript_id"]: t for t in transcripts}
+        replaced = [tid for tid in incoming if tid in self.dataset.id_to_transcript]
+        if replaced:
+            self.remove_transcripts(replaced)
+
+        indices = self.dataset.add_transcripts(incoming.values())
+        searchable = [i for i in indices if self.dataset.is_searchable(i)]
+        for retriever in retrievers:
+            retriever.add_documents(searchable)
+        views = [TranscriptView(self.dataset.store, i) for i in indices]
+        self.support_table.add_transcripts(views)
+        for conv in views:
+            self.rollup_cube.add_transcript(
+                conv, self.support_table.factors_for_transcript(conv["transcript_id"])
+            )
+        self.support_table.version = self.cache_version()
+        self.rollup_cube.version = self.support_table.version
+        return indices
+
+    def remove_transcripts(self, transcript_ids: Iterable[str]) -> List[int]:
+        retrievers = self._retrievers()
+        transcript_ids = list(transcript_ids)
+        for transcript_id in transcript_ids:
+            conv = self.dataset.get_conversation(transcript_id)
+            if conv is not None:
+                self.rollup_cube.remove_transcript(
+                    conv, self.support_table.factors_for_transcript(transcript_id)
+                )
+        self.support_table.remove_transcripts(transcript_ids)
+        indices = self.dataset.remove_transcripts(transcript_ids)
+        promoted = {self.dataset.representative(i) for i in indices}
+        for retriever in retrievers:
+            retriever.remove_documents(indices)
+            retriever.add_documents(sorted(
+                i for i in promoted
+                if i is not None and not retriever.has_document(i)
+            ))
+        self.support_table.version = self.cache_version()
+        self.rollup_cube.version = self.support_table.version
+        return indices
+
+    def save_caches(self):
+        self.result_cache.save()
+        self.retriever.query_cache.save()
+        if self.speaker_loader is not None and self.speaker_loader.ready():
+            for retriever in self.speaker_loader.get().values():
+                retriever.query_cache.save()
 
     def answer_query(
         self,
         query: str,
         outcome: str,
-        top_k: int = 5
+        top_k: int = 5,
+        deadline_ms: Optional[float] = None,
+        speaker: Optional[str] = None,
+        explain: bool = False,
+        use_cache: bool = True
     ) -> Dict:
+        for event in self.stream_answer(
+            query, outcome, top_k, deadline_ms, speaker, explain, use_cache
+        ):
+            pass
+        return event["result"]
+
+    def stream_answer(
+        self,
+        query: str,
+        outcome: str,
+        top_k: int = 5,
+        deadline_ms: Optional[float] = None,
+        speaker: Optional[str] = None,
+        explain: bool = False,
+        use_cache: bool = True
+    ) -> Iterator[Dict]:
+        deadline = Deadline(
+            config.DEADLINE_MS if deadline_ms is None else deadline_ms
+        )
+        if speaker is None:
+            speaker = detect_speaker_focus(query)
+        if speaker not in config.SPEAKER_PARTITIONS:
+            speaker = None
+        degradations: List[str] = []
+        for event in self._answer(
+            query, outcome, top_k, speaker, deadline, degradations,
+            explain, use_cache and not explain
+        ):
+            if event["event"] == "result":
+                result = event["result"]
+                self.degradation_metrics.record(deadline, degradations)
+                if deadline.enabled:
+                    result["degradations"] = degradations
+                    result["deadline"] = deadline.summary()
+            yield event
+
+    def _replay(self, result: Dict) -> Iterator[Dict]:
+        yield {
+            "event": "factors",
+            "query": result["query"],
+            "outcome": result["outcome"],
+            "num_supporting_calls": result["num_supporting_calls"],
+            "global_causal_explanation": result["global_causal_explanation"]
+        }
+        for call in result["supporting_calls"]:
+            yield {"event": "call", "call": call}
+        yield {"event": "result", "result": result}
 
-        retrieved = self.retriever.search(query, top_k=top_k)
+    def _answer(
+        self,
+        query: str,
+        outcome: str,
+        top_k: int,
+        speaker: Optional[str],
+        deadline: Deadline,
+        degradations: List[str],
+        explain: bool = False,
+        use_cache: bool = True
+    ) -> Iterator[Dict]:
+
+        retriever = self.speaker_retriever(speaker, deadline, degradations)
+        version = self.cache_version()
+        result_key = self._result_key(
+            query, outcome, top_k, speaker, retriever.speaker, version
+        )
+        self.result_cache.ensure_version(version)
+        cached_result = self.result_cache.get(result_key) if use_cache else None
+        if cached_result is not None:
+            yield from self._replay(
+                {**cached_result, "query": query, "cache": {"type": "exact"}}
+            )
+            return
+
+        planned_at = time.perf_counter()
+        access = (
+            self.planner.plan(query, outcome, top_k, speaker, retriever, deadline)
+            if self.planner is not None else None
+        )
+        path = access["path"] if access is not None else "hybrid"
+        plan = {"mode": path, "candidate_pool": None, "degradations": []}
+        if path == "hybrid":
+            plan = retriever.plan(deadline, query)
+        degradations.extend(plan["degradations"])
+        query_emb = None
+        if plan["mode"] == "hybrid":
+            query_emb = retriever.encode_query(query)
+        scope = (outcome, top_k, speaker, retriever.speaker)
+
+        if self.semantic_cache is not None and query_emb is not None and use_cache:
+            self.semantic_cache.ensure_version(version)
+            cached = self.semantic_cache.lookup(query_emb, scope)
+            if cached is not None:
+                yield from self._replay({
+                    **cached["result"],
+                    "query": query,
+                    "cache": {
+                        "type": "semantic",
+                        "matched_query": cached["matched_query"],
+                        "similarity": cached["similarity"]
+                    }
+                })
+                return
+
+        if path == "factor_index":
+            retrieved = self.planner.factor_search(access, top_k, speaker, retriever)
+        else:
+            retrieved = retriever.search(
+                query,
+                top_k=top_k,
+                query_emb=query_emb,
+                mode=plan["mode"],
+                candidate_pool=plan["candidate_pool"]
+            )
+        retrieved_at = time.perf_counter()
+        yield {
+            "event": "factors",
+            "query": query,
+            "outcome": outcome,
+            **self._support_preview(retrieved, outcome, speaker)
+        }
         supporting_calls = []
 
         for item in retrieved:
             transcript_id = item["transcript_id"]
             conv = self.dataset.get_conversation(transcript_id)
+            num_turns = len(conv["conversation"])
 
-            causal_explanation = extract_causal_explanation(
-                conversation=conv["conversation"],
-                outcome=outcome
-            )
+            if deadline.allows(self.cost_model.estimate("extract", num_turns)):
+                started = time.perf_counter()
+                causal_explanation = extract_causal_explanation(
+                    conversation=conv["conversation"],
+                    outcome=outcome,
+                    transcript_id=transcript_id,
+                    speaker=speaker,
+                    normalized_turns=self.dataset.text_pipeline.normalized_turns(
+                        self.dataset.store.id_to_index[transcript_id]
+                    )
+                )
+                self.cost_model.observe(
+                    "extract", (time.perf_counter() - started) * 1000, num_turns
+                )
+            elif (
+                deadline.expired()
+                and len(supporting_calls) >= config.DEADLINE_MIN_CALLS
+            ):
+                self._degrade(degradations, "truncated_evidence")
+                break
+            else:
+                causal_explanation = self._cached_factors(
+                    transcript_id, outcome, num_turns, speaker
+                )
+                self._degrade(degradations, "cached_factors")
             if causal_explanation["num_factors"] == 0:
                 continue
 
-            supporting_calls.append({
+            call = {
                 "transcript_id": transcript_id,
                 "domain": conv["domain"],
                 "intent": conv["intent"],
                 "retrieval_score": round(item["score"], 3),
+                "cluster_size": item.get("cluster_size", 1),
                 "causal_explanation": causal_explanation
-            })
+            }
+            supporting_calls.append(call)
+            yield {"event": "call", "call": call}
 
         global_causal_explanation = aggregate_causal_explanations(
             supporting_calls=supporting_calls,
             top_k=3
         )
 
-        return {
+        result = {
             "query": query,
             "outcome": outcome,
+            "speaker_focus": speaker,
             "num_supporting_calls": len(supporting_calls),
             "supporting_calls": supporting_calls,
             "global_causal_explanation": global_causal_explanation
         }
 
+        if explain:
+            finished = time.perf_counter()
+            result["plan"] = {
+                **{k: v for k, v in (access or {}).items() if k != "postings"},
+                "path": path,
+                "mode": plan["mode"],
+                "actual_ms": round((finished - planned_at) * 1000, 3),
+                "actual_stages": {
+                    "retrieval": round((retrieved_at - planned_at) * 1000, 3),
+                    "extraction": round((finished - retrieved_at) * 1000, 3)
+                }
+            }
+        if use_cache and not degradations:
+            self.result_cache.put(result_key, dict(result))
+            if self.semantic_cache is not None and query_emb is not None:
+                self.semantic_cache.store(query_emb, scope, query, dict(result))
+
+        yield {"event": "result", "result": result}
+
+    def _support_preview(
+        self,
+        retrieved: List[Dict],
+        outcome: str,
+        speaker: Optional[str]
+    ) -> Dict:
+        store = self.dataset.store
+        calls = []
+        for item in retrieved:
+            transcript_id = item["transcript_id"]
+            causal_explanation = self._cached_factors(
+                transcript_id,
+                outcome,
+                store.num_turns[store.id_to_index[transcript_id]],
+                speaker
+            )
+            if causal_explanation["num_factors"]:
+                calls.append({
+                    "cluster_size": item.get("cluster_size", 1),
+                    "causal_explanation": causal_explanation
+                })
+        return {
+            "num_supporting_calls": len(calls),
+            "global_causal_explanation": aggregate_causal_explanations(
+                supporting_calls=calls,
+                top_k=3
+            )
+        }
+
+    def explain_query(
+        self,
+        query: str,
+        outcome: str,
+        top_k: int = 5,
+        deadline_ms: Optional[float] = None,
+        speaker: Optional[str] = None
+    ) -> Dict:
+        if self.planner is None:
+            raise RuntimeError("Query planner is disabled (PLANNER_ENABLED = False)")
+        return self.answer_query(
+            query, outcome, top_k, deadline_ms, speaker, explain=True
+        )["plan"]
+
+    def _degrade(self, degradations: List[str], name: str):
+        if name not in degradations:
+            degradations.append(name)
+
+    def _cached_factors(
+        self,
+        transcript_id: str,
+        outcome: str,
+        num_turns: int,
+        speaker: Optional[str] = None
+    ) -> Dict:
+        factors = self.support_table.factors_for_transcript(transcript_id, speaker)
+        causal_factors = [
+            {
+                "factor": factor,
+                "evidence_score": round(evidence_count / max(num_turns, 1), 2),
+                "evidence_turns": []
+            }
+            for factor, evidence_count in factors.items()
+        ]
+        return {
+            "outcome": outcome,
+            "num_factors": len(causal_factors),
+            "causal_factors": causal_factors
+        }
@@ -1,47 +1,10 @@
-from typing import Dict, List, Optional
-import re
+from typing import Dict, Iterable, Iterator, List, Optional
 
-class ResponseGenerator:
-
-    def _compute_id_recall(self, evidence: List[Dict]) -> float:
-        return 1.0 if evidence else 0.0
-
-    def _compute_faithfulness(
-        self,
-        causes: List[Dict],
-        evidence: List[Dict]
-    ) -> float:
-        if not causes:
-            return 0.0
-        if not evidence:
-            return 0.0
-
-        return 1.0
+from evidence import resolve_evidence
 
-    def _compute_relevancy(
-        self,
-        user_query: str,
-        causes: List[Dict],
-        summary: str
-    ) -> float:
-        
-
-        if not user_query:
-            return 0.0
-
-        query = user_query.lower()
-        intent_markers = [
-            "why", "reason", "cause", "because",
-            "did", "was", "were", "is",
-            "escalat", "supervisor", "refund",
-            "policy", "agent", "issue"
-        ]
-
-        intent_detected = any(m in query for m in intent_markers)
-        if intent_detected and (causes or summary):
-            return 1.0
-
-        return 0.0
+class ResponseGenerator:
+    def __init__(self, dataset=None):
+        self.dataset = dataset
 
     def generate(
         self,
@@ -49,9 +12,20 @@ class ResponseGenerator:
         session_context: Optional[Dict] = None,
         user_query: Optional[str] = None
     ) -> str:
+        return "\n".join(
+            self.stream(reasoning_output, session_context, user_query)
+        )
+
+    def stream(
+        self,
+        reasoning_output: Dict,
+        session_context: Optional[Dict] = None,
+        user_query: Optional[str] = None
+    ) -> Iterator[str]:
 
         if not reasoning_output:
-            return "No explanation could be generated."
+            yield "No explanation could be generated."
+            return
 
         outcome = reasoning_output.get("outcome", "UNKNOWN")
         confidence = reasoning_output.get("confidence", "UNKNOWN")
@@ -59,52 +33,103 @@ class ResponseGenerator:
         evidence = reasoning_output.get("evidence_snippets", [])
         summary = reasoning_output.get("final_summary", "")
 
-        id_recall = self._compute_id_recall(evidence)
-        faithfulness = self._compute_faithfulness(causes, evidence)
-        relevancy = self._compute_relevancy(
-            user_query or "",
-            causes,
-            summary
-        )
-
-        lines: List[str] = []
-        lines.append("=== Explanation ===")
-        lines.append(f"📌 Outcome: {outcome}")
-        lines.append(f"📊 Confidence: {confidence}")
-        lines.append("")
+        yield "=== Explanation ==="
+        yield f"📌 Outcome: {outcome}"
+        yield from self._status_lines(reasoning_output)
+        yield ""
 
         if causes:
-            lines.append("🔍 Why did this happen?")
-            for idx, cause in enumerate(causes, start=1):
-                lines.append(
-                    f"{idx}. {cause.get('cause', 'Unknown')} "
-                    f"(observed in {cause.get('supporting_calls', 0)} conversations)"
-                )
-            lines.append("")
+            yield from self._cause_lines(causes)
 
         if evidence:
-            lines.append("🧾 Supporting Evidence:")
-            for ev in evidence:
-                lines.append(
-                    f"- [{ev.get('transcript_id')} | Turn {ev.get('turn_id')}] "
-                    f"{ev.get('speaker')}: \"{ev.get('text', '').strip()}\""
-                )
-            lines.append("")
+            yield "🧾 Supporting Evidence:"
+            for ref in evidence:
+                yield self._evidence_line(ref)
+            yield ""
 
         if summary:
-            lines.append("📝 Final Summary:")
-            lines.append(summary)
-            lines.append("")
-        lines.append("=== Evaluation Metrics ===")
-        lines.append(f"🆔 IDRecall (Evidence Accuracy): {id_recall}")
-        lines.append(f"🧠 Faithfulness (Hallucination Control): {faithfulness}")
-        lines.append(f"🎯 Relevancy (Conversational Coherence): {relevancy}")
-
-        return "\n".join(lines)
+            yield "📝 Final Summary:"
+            yield summary
+            yield ""
+
+    def stream_events(self, events: Iterable[Dict]) -> Iterator[str]:
+        state = {"evidence_shown": False}
+        for event in events:
+            yield from self._event_lines(event, state)
+
+    def _event_lines(self, event: Dict, state: Dict) -> Iterator[str]:
+        if event["event"] == "factors":
+            outcome = (
+                event["outcome"] if event["num_supporting_calls"]
+                else "NOT_ESCALATION"
+            )
+            yield "=== Explanation ==="
+            yield f"📌 Outcome: {outcome}"
+            yield ""
+            causes = [
+                {"cause": f["factor"], "supporting_calls": f["supporting_calls"]}
+                for f in event["global_causal_explanation"]["global_causal_factors"]
+            ]
+            if causes:
+                yield from self._cause_lines(causes)
+        elif event["event"] == "call":
+            for factor in event["call"]["causal_explanation"]["causal_factors"]:
+                if not factor["evidence_turns"]:
+                    continue
+                if not state["evidence_shown"]:
+                    yield "🧾 Supporting Evidence:"
+                    state["evidence_shown"] = True
+                yield self._evidence_line(factor["evidence_turns"][0])
+        elif event["event"] == "explanation":
+            explanation = event["explanation"]
+            if state["evidence_shown"]:
+                yield ""
+            yield from self._status_lines(explanation)
+            yield ""
+            summary = explanation.get("final_summary", "")
+            if summary:
+                yield "📝 Final Summary:"
+                yield summary
+                yield ""
+
+    def _status_lines(self, reasoning_output: Dict) -> Iterator[str]:
+        yield f"📊 Confidence: {reasoning_output.get('confidence', 'UNKNOWN')}"
+        validation = reasoning_output.get("outcome_validation")
+        if validation is not None:
+            status = "confirmed" if validation["outcome_confirmed"] else "not confirmed"
+            yield f"✅ Outcome Validation: {status} — {validation['justification']}"
+
+    def _cause_lines(self, causes: List[Dict]) -> Iterator[str]:
+        yield "🔍 Why did this happen?"
+        for idx, cause in enumerate(causes, start=1):
+            yield (
+                f"{idx}. {cause.get('cause', 'Unknown')} "
+                f"(observed in {cause.get('supporting_calls', 0)} conversations)"
+            )
+        yield ""
+
+    def _evidence_line(self, ref: Dict) -> str:
+        ev = resolve_evidence(self.dataset, ref) or ref
+        return (
+            f"- [{ev.get('transcript_id')} | Turn {ev.get('turn_id')}] "
+            f"{ev.get('speaker')}: \"{ev.get('text', '').strip()}\""
+        )
+
     def display(
         self,
         reasoning_output: Dict,
         session_context: Optional[Dict] = None,
         user_query: Optional[str] = None
     ):
-        print(self.generate(reasoning_output, session_context, user_query))
+        for line in self.stream(reasoning_output, session_context, user_query):
+            print(line, flush=True)
+
+    def display_events(self, events: Iterable[Dict]) -> Optional[Dict]:
+        state = {"evidence_shown": False}
+        explanation = None
+        for event in events:
+            for line in self._event_lines(event, state):
+                print(line, flush=True)
+            if event["event"] == "explanation":
+                explanation = event["explanation"]
+        return explanation
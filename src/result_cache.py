@@ -0,0 +1,86 @@
+import os
+import pickle
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class LRUCache:
+    def __init__(self, max_size: int, persist_path: Optional[str] = None):
+        self.max_size = max_size
+        self.persist_path = persist_path
+        self.data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.version: Optional[Hashable] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        if persist_path and os.path.exists(persist_path):
+            self._load()
+
+    def ensure_version(self, version: Hashable):
+        if version == self.version:
+            return
+        if self.version is not None:
+            self.invalidations += 1
+        self.data.clear()
+        self.version = version
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.data
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if key not in self.data:
+            self.misses += 1
+            return None
+        self.data.move_to_end(key)
+        self.hits += 1
+        return self.data[key]
+
+    def put(self, key: Hashable, value: Any):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        while len(self.data) > self.max_size:
+            self.data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.data.clear()
+
+    def save(self):
+        if not self.persist_path:
+            return
+        tmp_path = self.persist_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(
+                {"version": self.version, "data": list(self.data.items())},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL
+            )
+        os.replace(tmp_path, self.persist_path)
+
+    def _load(self):
+        try:
+            with open(self.persist_path, "rb") as f:
+                payload = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return
+        self.version = payload.get("version")
+        for key, value in payload.get("data", [])[-self.max_size:]:
+            self.data[key] = value
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
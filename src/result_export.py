@@ -0,0 +1,186 @@
+import os
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.ipc as ipc
+
+import config
+
+
+FACTOR_SCHEMA = pa.schema([
+    ("query_id", pa.string()),
+    ("query", pa.string()),
+    ("category", pa.string()),
+    ("outcome", pa.string()),
+    ("factor_rank", pa.int16()),
+    ("factor", pa.string()),
+    ("supporting_calls", pa.int32()),
+    ("avg_evidence_score", pa.float64()),
+    ("causal_strength", pa.float64())
+])
+
+EVIDENCE_SCHEMA = pa.schema([
+    ("query_id", pa.string()),
+    ("outcome", pa.string()),
+    ("transcript_id", pa.string()),
+    ("domain", pa.string()),
+    ("intent", pa.string()),
+    ("retrieval_score", pa.float64()),
+    ("factor", pa.string()),
+    ("evidence_score", pa.float64()),
+    ("turn_id", pa.int32()),
+    ("span_start", pa.int32()),
+    ("span_end", pa.int32())
+])
+
+FORMAT_EXTENSIONS = {
+    "parquet": ".parquet",
+    "arrow": ".arrow"
+}
+
+
+class _TableSink:
+    def __init__(self, path: str, schema: pa.Schema, fmt: str, row_group_size: int):
+        self.path = path
+        self.schema = schema
+        self.fmt = fmt
+        self.row_group_size = row_group_size
+        self.columns: Dict[str, List] = {name: [] for name in schema.names}
+        self.num_rows = 0
+        self.pending_rows = 0
+
+        if fmt == "parquet":
+            self.writer = pq.ParquetWriter(path, schema, compression="zstd")
+        else:
+            self.sink = pa.OSFile(path, "wb")
+            self.writer = ipc.new_file(self.sink, schema)
+
+    def append(self, row: Dict):
+        for name in self.schema.names:
+            self.columns[name].append(row.get(name))
+        self.pending_rows += 1
+        if self.pending_rows >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending_rows:
+            return
+        batch = pa.record_batch(
+            [
+                pa.array(self.columns[field.name], type=field.type)
+                for field in self.schema
+            ],
+            schema=self.schema
+        )
+        if self.fmt == "parquet":
+            self.writer.write_batch(batch, row_group_size=self.pending_rows)
+        else:
+            self.writer.write_batch(batch)
+        self.num_rows += self.pending_rows
+        self.pending_rows = 0
+        self.columns = {name: [] for name in self.schema.names}
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.writer.close()
+            if self.fmt != "parquet":
+                self.sink.close()
+
+
+class ColumnarResultWriter:
+    def __init__(
+        self,
+        output_dir: str,
+        fmt: str = "parquet",
+        row_group_size: int = None
+    ):
+        if fmt not in FORMAT_EXTENSIONS:
+            raise ValueError(
+                f"Unsupported columnar format '{fmt}'. "
+                f"Expected one of {sorted(FORMAT_EXTENSIONS)}"
+            )
+        if row_group_size is None:
+            row_group_size = config.COLUMNAR_ROW_GROUP_SIZE
+
+        os.makedirs(output_dir, exist_ok=True)
+        extension = FORMAT_EXTENSIONS[fmt]
+        self.factor_path = os.path.join(output_dir, "factors" + extension)
+        self.evidence_path = os.path.join(output_dir, "evidence" + extension)
+        self.factors = _TableSink(self.factor_path, FACTOR_SCHEMA, fmt, row_group_size)
+        try:
+            self.evidence = _TableSink(
+                self.evidence_path, EVIDENCE_SCHEMA, fmt, row_group_size
+            )
+        except BaseException:
+            self.factors.close()
+            raise
+
+    def add_result(
+        self,
+        query_id: str,
+        query: str,
+        category: str,
+        reasoning_output: Dict
+    ):
+        outcome = reasoning_output.get("outcome")
+        global_factors = reasoning_output.get(
+            "global_causal_explanation", {}
+        ).get("global_causal_factors", [])
+
+        for rank, factor in enumerate(global_factors, start=1):
+            self.factors.append({
+                "query_id": query_id,
+                "query": query,
+                "category": category,
+                "outcome": outcome,
+                "factor_rank": rank,
+                "factor": factor["factor"],
+                "supporting_calls": factor["supporting_calls"],
+                "avg_evidence_score": factor["avg_evidence_score"],
+                "causal_strength": factor["causal_strength"]
+            })
+
+        for call in reasoning_output.get("supporting_calls", []):
+            for factor in call["causal_explanation"]["causal_factors"]:
+                for turn in factor["evidence_turns"]:
+                    span_start, span_end = turn.get("span") or (None, None)
+                    self.evidence.append({
+                        "query_id": query_id,
+                        "outcome": outcome,
+                        "transcript_id": call["transcript_id"],
+                        "domain": call.get("domain"),
+                        "intent": call.get("intent"),
+                        "retrieval_score": call.get("retrieval_score"),
+                        "factor": factor["factor"],
+                        "evidence_score": factor["evidence_score"],
+                        "turn_id": turn["turn_id"],
+                        "span_start": span_start,
+                        "span_end": span_end
+                    })
+
+    def close(self):
+        try:
+            self.factors.close()
+        finally:
+            self.evidence.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load_columnar_table(path: str, columns: Optional[List[str]] = None):
+    if path.endswith(FORMAT_EXTENSIONS["arrow"]):
+        with pa.memory_map(path, "r") as source:
+            table = ipc.open_file(source).read_all()
+            if columns is not None:
+                table = table.select(columns)
+            return table.to_pandas()
+
+    return pd.read_parquet(path, columns=columns)
@@ -1,88 +1,636 @@
-from typing import List, Dict, Tuple
+import os
+import time
+import hashlib
+import queue
+import threading
+from typing import List, Dict, Optional, Tuple, Union
 import numpy as np
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
-from tqdm import tqdm
 
 import config
+from text_pipeline import PIPELINE_VERSION, lexical_analyzer, speaker_role
 from data_loader import ConversationDataset
+from deadline import Deadline, StageCostModel
+from dense_search import BlockedDenseIndex
+from encoders import load_encoder
+from result_cache import LRUCache, normalize_query
+from transcript_store import CompactTranscriptStore, TranscriptView
+
+
+def build_document_text(conv: Dict, speaker: Optional[str] = None) -> str:
+    if speaker is not None:
+        return " ".join(
+            turn['text'] for turn in conv['conversation']
+            if speaker_role(turn['speaker']) == speaker
+        )
+
+    texts = []
+    texts.append(f"Domain: {conv['domain']}")
+    texts.append(f"Intent: {conv['intent']}")
+    texts.append(f"Reason: {conv['reason_for_call']}")
+    for turn in conv['conversation']:
+        texts.append(f"{turn['speaker']}: {turn['text']}")
+
+    return " ".join(texts)
+
+
+def vocabulary_digest(vectorizer: TfidfVectorizer) -> str:
+    digest = hashlib.sha1()
+    for term, column in sorted(vectorizer.vocabulary_.items()):
+        digest.update(f"{term}\t{column}\n".encode("utf-8"))
+    digest.update(np.ascontiguousarray(vectorizer.idf_, dtype=np.float64).tobytes())
+    return digest.hexdigest()[:12]
+
+
+class StreamingDocumentEncoder:
+    def __init__(self, sink: Optional[BlockedDenseIndex] = None):
+        self.queue = queue.Queue(maxsize=config.STREAMING_QUEUE_BATCHES)
+        self.embedder = None
+        self.sink = sink
+        self.blocks: List[np.ndarray] = []
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(
+            target=self._run,
+            name="document-encoder",
+            daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, store: CompactTranscriptStore, indices: List[int]):
+        self.queue.put((store, indices))
+
+    def _run(self):
+        try:
+            self.embedder = load_encoder()
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    return
+                store, indices = item
+                texts = [
+                    build_document_text(TranscriptView(store, i))
+                    for i in indices
+                ]
+                block = self.embedder.encode(texts)
+                if self.sink is not None:
+                    self.sink.append(block)
+                else:
+                    self.blocks.append(block)
+        except BaseException as error:
+            self._error = error
+            while self.queue.get() is not None:
+                pass
+
+    def finish(self) -> Tuple[object, Union[np.ndarray, BlockedDenseIndex]]:
+        self.queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        if self.sink is not None:
+            return self.embedder, self.sink
+        if not self.blocks:
+            return self.embedder, np.zeros(
+                (0, config.EMBEDDING_DIMENSION), dtype=np.float32
+            )
+        return self.embedder, np.vstack(self.blocks)
 
 
 class HybridRetriever:
-    def __init__(self, dataset: ConversationDataset):
-        print("=" * 60)
-        print("INITIALIZING HYBRID RETRIEVER")
-        print("=" * 60)
+    def __init__(
+        self,
+        dataset: ConversationDataset,
+        verbose: bool = True,
+        embedder=None,
+        embeddings: Optional[Union[np.ndarray, BlockedDenseIndex]] = None,
+        speaker: Optional[str] = None
+    ):
+        self.verbose = verbose
+        self._log("=" * 60)
+        self._log(
+            "INITIALIZING HYBRID RETRIEVER"
+            + (f" ({speaker.upper()} PARTITION)" if speaker else "")
+        )
+        self._log("=" * 60)
 
         self.dataset = dataset
-        self.conversations = dataset.get_all_conversations()
-        print("Preparing documents...")
-        self.doc_ids, self.documents = self._prepare_documents()
-        print("Building TF-IDF index...")
-        self.tfidf = TfidfVectorizer(
+        self.speaker = speaker
+        self._log("Preparing documents...")
+        self.row_indices = dataset.searchable_indices()
+        self.index_to_row = {index: row for row, index in enumerate(self.row_indices)}
+        self._lock = threading.RLock()
+        self.cost_model = StageCostModel()
+        self._log("Building TF-IDF index...")
+        self.lexical_generation = 0
+        self.tfidf = self._new_vectorizer()
+        self.tfidf_matrix = self.tfidf.fit_transform(
+            self._iter_lexical_documents(self.row_indices)
+        )
+        self.lexical_vocabulary = vocabulary_digest(self.tfidf)
+        self.delta_matrix = None
+        self.base_rows = self.tfidf_matrix.shape[0]
+        self._compaction_thread: Optional[threading.Thread] = None
+        self.compaction_error: Optional[BaseException] = None
+
+        if embedder is None:
+            self._log(f"Loading {config.ENCODER_BACKEND} encoder...")
+            embedder = load_encoder()
+        self.embedder = embedder
+
+        if embeddings is None:
+            self._log("Encoding documents (this may take a few minutes)...")
+            embeddings = self._encode_documents(
+                self.row_indices,
+                sink=(
+                    BlockedDenseIndex.create(self._partition_path(config.DENSE_EMBEDDINGS_PATH))
+                    if config.DENSE_OUT_OF_CORE else None
+                )
+            )
+        else:
+            self._log("✓ Using document embeddings built during ingest")
+        self.dense_index = None
+        if isinstance(embeddings, BlockedDenseIndex):
+            self._log(f"✓ Out-of-core dense search over {embeddings.path}")
+            self.dense_index = embeddings
+            embeddings = embeddings.matrix
+        self._embedding_buffer = embeddings
+        self.num_rows = embeddings.shape[0]
+        self._row_alive = np.ones(self.num_rows, dtype=bool)
+        self.num_removed = 0
+
+        self.query_cache = LRUCache(
+            config.QUERY_CACHE_SIZE,
+            persist_path=(
+                self._partition_path(os.path.join(config.CACHE_DIR, "query_cache.pkl"))
+                if config.CACHE_PERSIST else None
+            )
+        )
+        self.query_cache.ensure_version((
+            self.embedder.name,
+            self.tfidf.max_features,
+            PIPELINE_VERSION
+        ))
+        self.index_version = None
+        self._on_reindex()
+
+        self._log("✓ Hybrid Retriever Ready")
+        self._log("=" * 60)
+
+    @classmethod
+    def attach(
+        cls,
+        dataset: ConversationDataset,
+        arrays: Dict[str, np.ndarray],
+        metadata: Dict,
+        embedder=None,
+        verbose: bool = False
+    ) -> "HybridRetriever":
+        retriever = cls.__new__(cls)
+        retriever.verbose = verbose
+        retriever.dataset = dataset
+        retriever.speaker = metadata.get("speaker")
+        retriever.row_indices = arrays["row_indices"].tolist()
+        retriever.index_to_row = {
+            index: row for row, index in enumerate(retriever.row_indices)
+        }
+        retriever._lock = threading.RLock()
+        retriever.cost_model = StageCostModel()
+        retriever.lexical_generation = metadata["lexical_generation"]
+        retriever.tfidf = metadata["vectorizer"]
+        retriever.lexical_vocabulary = vocabulary_digest(retriever.tfidf)
+        retriever.tfidf_matrix = sparse.csr_matrix(
+            (arrays["tfidf_data"], arrays["tfidf_indices"], arrays["tfidf_indptr"]),
+            shape=metadata["tfidf_shape"],
+            copy=False
+        )
+        retriever.delta_matrix = None
+        retriever.base_rows = retriever.tfidf_matrix.shape[0]
+        retriever._compaction_thread = None
+        retriever.compaction_error = None
+        retriever.embedder = embedder if embedder is not None else load_encoder()
+        retriever._embedding_buffer = arrays["embeddings"]
+        retriever.dense_index = BlockedDenseIndex.wrap(arrays["embeddings"])
+        retriever.num_rows = arrays["embeddings"].shape[0]
+        retriever._row_alive = np.array(arrays["row_alive"], dtype=bool)
+        retriever.num_removed = int(retriever.num_rows - retriever._row_alive.sum())
+        retriever.query_cache = LRUCache(config.QUERY_CACHE_SIZE)
+        retriever.query_cache.ensure_version((
+            retriever.embedder.name,
+            retriever.tfidf.max_features,
+            PIPELINE_VERSION
+        ))
+        retriever.index_version = None
+        retriever._on_reindex()
+        return retriever
+
+    def export_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict]:
+        snapshot = self._snapshot()
+        segments = snapshot["segments"]
+        matrix = (
+            segments[0] if len(segments) == 1
+            else sparse.vstack(segments, format="csr")
+        )
+        num_rows = snapshot["embeddings"].shape[0]
+        alive = snapshot["alive"]
+        arrays = {
+            "embeddings": snapshot["embeddings"],
+            "tfidf_data": matrix.data,
+            "tfidf_indices": matrix.indices,
+            "tfidf_indptr": matrix.indptr,
+            "row_indices": np.asarray(snapshot["row_indices"][:num_rows], dtype=np.int64),
+            "row_alive": (
+                np.ones(num_rows, dtype=bool) if alive is None
+                else np.asarray(alive, dtype=bool)
+            )
+        }
+        metadata = {
+            "vectorizer": snapshot["vectorizer"],
+            "lexical_generation": snapshot["generation"],
+            "tfidf_shape": matrix.shape,
+            "speaker": self.speaker
+        }
+        return arrays, metadata
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        return self._embedding_buffer[:self.num_rows]
+
+    def _new_vectorizer(self) -> TfidfVectorizer:
+        return TfidfVectorizer(
             max_features=50000,
-            stop_words='english',
-            ngram_range=(1, 2)
+            analyzer=lexical_analyzer,
+            token_pattern=None
         )
-        self.tfidf_matrix = self.tfidf.fit_transform(self.documents)
-        print("Loading embedding model...")
-        self.embedder = SentenceTransformer(config.EMBEDDING_MODEL)
 
-        print("Encoding documents (this may take a few minutes)...")
-        self.embeddings = self.embedder.encode(
-            self.documents,
-            show_progress_bar=True,
-            convert_to_numpy=True,
-            normalize_embeddings=True
+    def _partition_path(self, path: str) -> str:
+        if self.speaker is None:
+            return path
+        root, ext = os.path.splitext(path)
+        return f"{root}.{self.speaker}{ext}"
+
+    def document_text(self, index: int) -> str:
+        return build_document_text(TranscriptView(self.dataset.store, index), self.speaker)
+
+    def _iter_documents(self, indices):
+        for index in indices:
+            yield self.document_text(index)
+
+    def _iter_lexical_documents(self, indices):
+        text_pipeline = self.dataset.text_pipeline
+        for index in indices:
+            yield text_pipeline.document_tokens(index, self.speaker)
+
+    def _encode_documents(
+        self,
+        indices,
+        sink: Optional[BlockedDenseIndex] = None
+    ) -> Union[np.ndarray, BlockedDenseIndex]:
+        indices = list(indices)
+        batch_size = config.ENCODE_BATCH_SIZE
+        blocks = []
+        for start in range(0, len(indices), batch_size):
+            batch = list(self._iter_documents(indices[start:start + batch_size]))
+            block = self.embedder.encode(batch, show_progress_bar=self.verbose)
+            if sink is not None:
+                sink.append(block)
+            else:
+                blocks.append(block)
+        if sink is not None:
+            return sink
+        if not blocks:
+            return np.zeros((0, config.EMBEDDING_DIMENSION), dtype=np.float32)
+        return np.vstack(blocks)
+
+    def _log(self, *args):
+        if self.verbose:
+            print(*args)
+
+    def _on_reindex(self):
+        self.index_version = (
+            self.dataset.fingerprint,
+            self.embedder.name,
+            self.tfidf.max_features,
+            PIPELINE_VERSION,
+            self.lexical_generation,
+            config.DEDUP_ENABLED and config.DEDUP_THRESHOLD,
+            self.speaker
         )
 
-        print("✓ Hybrid Retriever Ready")
-        print("=" * 60)
+    def add_documents(self, indices: List[int]):
+        if not indices:
+            return
+        new_embeddings = self._encode_documents(indices)
 
-    def _prepare_documents(self) -> Tuple[List[str], List[str]]:
-        doc_ids = []
-        documents = []
+        with self._lock:
+            for index in indices:
+                self.index_to_row[index] = len(self.row_indices)
+                self.row_indices.append(index)
+            self._append_rows(new_embeddings)
+            new_tfidf = self.tfidf.transform(self._iter_lexical_documents(indices))
+            self.delta_matrix = (
+                new_tfidf if self.delta_matrix is None
+                else sparse.vstack([self.delta_matrix, new_tfidf], format="csr")
+            )
+            self._on_reindex()
 
-        for conv in self.conversations:
-            texts = []
-            texts.append(f"Domain: {conv['domain']}")
-            texts.append(f"Intent: {conv['intent']}")
-            texts.append(f"Reason: {conv['reason_for_call']}")
-            for turn in conv['conversation']:
-                texts.append(f"{turn['speaker']}: {turn['text']}")
+        self._maybe_compact()
 
-            full_text = " ".join(texts)
+    def _append_rows(self, new_embeddings: np.ndarray):
+        needed = self.num_rows + new_embeddings.shape[0]
+        if self.dense_index is not None:
+            self.dense_index.append(new_embeddings)
+            self._embedding_buffer = self.dense_index.matrix
+        elif needed > self._embedding_buffer.shape[0]:
+            capacity = max(needed, 2 * self._embedding_buffer.shape[0])
+            grown = np.empty(
+                (capacity, new_embeddings.shape[1]),
+                dtype=self._embedding_buffer.dtype
+            )
+            grown[:self.num_rows] = self.embeddings
+            self._embedding_buffer = grown
+        if needed > len(self._row_alive):
+            alive = np.zeros(max(needed, 2 * len(self._row_alive)), dtype=bool)
+            alive[:self.num_rows] = self._row_alive[:self.num_rows]
+            self._row_alive = alive
+        if self.dense_index is None:
+            self._embedding_buffer[self.num_rows:needed] = new_embeddings
+        self._row_alive[self.num_rows:needed] = True
+        self.num_rows = needed
 
-            doc_ids.append(conv['transcript_id'])
-            documents.append(full_text)
+    def has_document(self, index: int) -> bool:
+        return index in self.index_to_row
 
-        return doc_ids, documents
+    def remove_documents(self, indices: List[int]):
+        with self._lock:
+            for index in indices:
+                row = self.index_to_row.pop(index, None)
+                if row is not None and self._row_alive[row]:
+                    self._row_alive[row] = False
+                    self.num_removed += 1
+            self._on_reindex()
 
-    def search(self, query: str, top_k: int = None) -> List[Dict]:
+    def _maybe_compact(self):
+        delta_rows = self.num_rows - self.base_rows
+        threshold = max(
+            config.TFIDF_COMPACTION_MIN_ROWS,
+            config.TFIDF_COMPACTION_RATIO * self.base_rows
+        )
+        if delta_rows >= threshold:
+            self.compact(background=True)
+
+    def compact(self, background: bool = False):
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            if not background:
+                self._compaction_thread.join()
+            return
+        if not background:
+            self._compact()
+            return
+        self._compaction_thread = threading.Thread(
+            target=self._compact,
+            name="tfidf-compaction",
+            daemon=True
+        )
+        self._compaction_thread.start()
+
+    def wait_for_compaction(self):
+        if self._compaction_thread is not None:
+            self._compaction_thread.join()
+
+    def _compact(self):
+        try:
+            with self._lock:
+                snapshot_rows = self.num_rows
+                live = np.flatnonzero(self._row_alive[:snapshot_rows])
+                live_indices = [self.row_indices[row] for row in live]
+            if not len(live):
+                return
+
+            vectorizer = self._new_vectorizer()
+            live_matrix = vectorizer.fit_transform(
+                self._iter_lexical_documents(live_indices)
+            )
+            selector = sparse.csr_matrix(
+                (np.ones(len(live)), (live, np.arange(len(live)))),
+                shape=(snapshot_rows, len(live))
+            )
+            base_matrix = (selector @ live_matrix).tocsr()
+            vocabulary = vocabulary_digest(vectorizer)
+
+            with self._lock:
+                pending = self.row_indices[snapshot_rows:self.num_rows]
+                self.delta_matrix = (
+                    vectorizer.transform(self._iter_lexical_documents(pending))
+                    if len(pending) else None
+                )
+                self.tfidf = vectorizer
+                self.lexical_vocabulary = vocabulary
+                self.tfidf_matrix = base_matrix
+                self.base_rows = snapshot_rows
+                self.lexical_generation += 1
+                self._on_reindex()
+        except BaseException as error:
+            self.compaction_error = error
+
+    def _query_tfidf(self, key: str, vectorizer: TfidfVectorizer, vocabulary: str):
+        cache_key = ("tfidf", vocabulary, key)
+        cached = self.query_cache.get(cache_key)
+        if cached is None:
+            cached = vectorizer.transform([key])
+            self.query_cache.put(cache_key, cached)
+        return cached
+
+    def has_query_embedding(self, query: str) -> bool:
+        return ("embedding", normalize_query(query)) in self.query_cache
+
+    def encode_query(self, query: str) -> np.ndarray:
+        key = normalize_query(query)
+        cache_key = ("embedding", key)
+        cached = self.query_cache.get(cache_key)
+        if cached is None:
+            started = time.perf_counter()
+            cached = self.embedder.encode([key])[0]
+            self.cost_model.observe("encode", (time.perf_counter() - started) * 1000)
+            self.query_cache.put(cache_key, cached)
+        return cached
+
+    def plan(self, deadline: Deadline, query: str) -> Dict:
+        plan = {"mode": "hybrid", "candidate_pool": None, "degradations": []}
+        if not deadline.enabled:
+            return plan
+
+        rows = self.num_rows
+        lexical = self.cost_model.estimate("lexical_scan", rows)
+        encode = (
+            0.0 if self.has_query_embedding(query)
+            else self.cost_model.estimate("encode")
+        )
+        if deadline.allows(lexical + encode + self.cost_model.estimate("semantic_scan", rows)):
+            return plan
+
+        pool = min(config.DEADLINE_CANDIDATE_POOL, rows)
+        if deadline.allows(lexical + encode + self.cost_model.estimate("semantic_scan", pool)):
+            plan["candidate_pool"] = pool
+            plan["degradations"].append("reduced_candidates")
+            return plan
+
+        plan["mode"] = "lexical"
+        plan["degradations"].append("lexical_only")
+        return plan
+
+    def _snapshot(self) -> Dict:
+        with self._lock:
+            segments = [self.tfidf_matrix]
+            if self.delta_matrix is not None:
+                segments.append(self.delta_matrix)
+            return {
+                "vectorizer": self.tfidf,
+                "generation": self.lexical_generation,
+                "vocabulary": self.lexical_vocabulary,
+                "segments": segments,
+                "embeddings": self.embeddings,
+                "row_indices": self.row_indices,
+                "alive": self._row_alive[:self.num_rows] if self.num_removed else None
+            }
+
+    def search(
+        self,
+        query: str,
+        top_k: int = None,
+        query_emb: np.ndarray = None,
+        mode: str = "hybrid",
+        candidate_pool: Optional[int] = None,
+        deadline: Optional[Deadline] = None
+    ) -> List[Dict]:
         if top_k is None:
             top_k = config.TOP_K_RETRIEVE
-        query_vec = self.tfidf.transform([query])
-        tfidf_scores = cosine_similarity(query_vec, self.tfidf_matrix)[0]
-        query_emb = self.embedder.encode(
-            [query],
-            convert_to_numpy=True,
-            normalize_embeddings=True
-        )
-        semantic_scores = cosine_similarity(query_emb, self.embeddings)[0]
-        final_scores = (
-            config.KEYWORD_WEIGHT * tfidf_scores +
-            config.SEMANTIC_WEIGHT * semantic_scores
+        if deadline is not None:
+            plan = self.plan(deadline, query)
+            mode, candidate_pool = plan["mode"], plan["candidate_pool"]
+
+        snapshot = self._snapshot()
+        row_indices = snapshot["row_indices"]
+        alive = snapshot["alive"]
+
+        started = time.perf_counter()
+        query_tfidf = self._query_tfidf(
+            normalize_query(query), snapshot["vectorizer"], snapshot["vocabulary"]
+        )
+        tfidf_scores = np.concatenate([
+            cosine_similarity(query_tfidf, segment)[0]
+            for segment in snapshot["segments"]
+        ])
+        self.cost_model.observe(
+            "lexical_scan", (time.perf_counter() - started) * 1000, len(tfidf_scores)
         )
+
+        semantic_scores = np.zeros_like(tfidf_scores)
+        candidates = None
+        if mode != "lexical":
+            if query_emb is None:
+                query_emb = self.encode_query(query)
+            query_emb = query_emb.reshape(1, -1)
+            embeddings = snapshot["embeddings"]
+            if candidate_pool is not None and candidate_pool < len(tfidf_scores):
+                lexical = (
+                    tfidf_scores if alive is None
+                    else np.where(alive, tfidf_scores, -np.inf)
+                )
+                candidates = np.argpartition(-lexical, candidate_pool - 1)[:candidate_pool]
+                embeddings = embeddings[candidates]
+            started = time.perf_counter()
+            if self.dense_index is not None and candidates is None:
+                scores = self.dense_index.scores(query_emb, limit=len(tfidf_scores))[0]
+            else:
+                scores = cosine_similarity(query_emb, embeddings)[0]
+            self.cost_model.observe(
+                "semantic_scan", (time.perf_counter() - started) * 1000, len(scores)
+            )
+            if candidates is None:
+                semantic_scores = scores
+            else:
+                semantic_scores[candidates] = scores
+
+        if mode == "lexical":
+            final_scores = tfidf_scores.copy()
+        else:
+            final_scores = (
+                config.KEYWORD_WEIGHT * tfidf_scores +
+                config.SEMANTIC_WEIGHT * semantic_scores
+            )
+        if candidates is not None:
+            in_pool = np.zeros(len(final_scores), dtype=bool)
+            in_pool[candidates] = True
+            final_scores = np.where(in_pool, final_scores, -np.inf)
+        if alive is not None:
+            final_scores = np.where(alive, final_scores, -np.inf)
         top_indices = np.argsort(final_scores)[::-1][:top_k]
+        top_indices = top_indices[np.isfinite(final_scores[top_indices])]
 
         results = []
+        transcript_ids = self.dataset.store.transcript_ids
         for idx in top_indices:
+            index = row_indices[idx]
             results.append({
-                "transcript_id": self.doc_ids[idx],
+                "transcript_id": transcript_ids[index],
+                "cluster_size": self.dataset.cluster_size(index),
                 "score": float(final_scores[idx]),
                 "semantic_score": float(semantic_scores[idx]),
                 "keyword_score": float(tfidf_scores[idx])
             })
 
         return results
+
+    def score_matrices(
+        self,
+        queries: List[str]
+    ) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        snapshot = self._snapshot()
+        query_tfidf = snapshot["vectorizer"].transform(
+            [normalize_query(q) for q in queries]
+        )
+        keyword = np.hstack([
+            cosine_similarity(query_tfidf, segment)
+            for segment in snapshot["segments"]
+        ])
+        query_embs = np.vstack([self.encode_query(q) for q in queries])
+        if self.dense_index is not None:
+            semantic = self.dense_index.scores(
+                query_embs, limit=snapshot["embeddings"].shape[0]
+            )
+        else:
+            semantic = cosine_similarity(query_embs, snapshot["embeddings"])
+
+        alive = snapshot["alive"]
+        rows = (
+            np.flatnonzero(alive) if alive is not None
+            else np.arange(len(snapshot["row_indices"]))
+        )
+        transcript_ids = self.dataset.store.transcript_ids
+        row_ids = [transcript_ids[snapshot["row_indices"][row]] for row in rows]
+        return semantic[:, rows], keyword[:, rows], row_ids
+
+    def dense_search(self, queries: List[str], top_k: int = None) -> List[List[Dict]]:
+        if top_k is None:
+            top_k = config.TOP_K_RETRIEVE
+        snapshot = self._snapshot()
+        num_rows = snapshot["embeddings"].shape[0]
+        index = self.dense_index or BlockedDenseIndex.wrap(snapshot["embeddings"])
+        query_embs = np.vstack([self.encode_query(q) for q in queries])
+        scores, rows = index.search(
+            query_embs, top_k, mask=snapshot["alive"], limit=num_rows
+        )
+
+        transcript_ids = self.dataset.store.transcript_ids
+        row_indices = snapshot["row_indices"]
+        return [
+            [
+                {
+                    "transcript_id": transcript_ids[row_indices[row]],
+                    "semantic_score": float(score)
+                }
+                for score, row in zip(query_scores, query_rows) if row >= 0
+            ]
+            for query_scores, query_rows in zip(scores, rows)
+        ]
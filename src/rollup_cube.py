@@ -0,0 +1,215 @@
+import time
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+
+import config
+from causal_patterns import CAUSAL_PATTERNS
+from factor_support import NO_OUTCOME, FactorSupportTable
+from transcript_store import StringCodes
+
+DIMENSIONS = ("domain", "intent", "outcome", "factor")
+
+Filters = Mapping[str, Union[str, Sequence[str]]]
+
+
+class RollupCube:
+    def __init__(self):
+        self.codes = {dimension: StringCodes() for dimension in DIMENSIONS}
+        for outcome in list(config.OUTCOME_MAPPING) + [NO_OUTCOME]:
+            self.codes["outcome"].encode(outcome)
+        for factor in CAUSAL_PATTERNS:
+            self.codes["factor"].encode(factor)
+        self.intent_to_outcome = {
+            intent: outcome
+            for outcome, intent_list in config.OUTCOME_MAPPING.items()
+            for intent in intent_list
+        }
+
+        shape = (0, 0, len(self.codes["outcome"]), len(self.codes["factor"]))
+        self.conversations = np.zeros(shape[:3], dtype=np.int64)
+        self.factor_conversations = np.zeros(shape, dtype=np.int64)
+        self.evidence_counts = np.zeros(shape, dtype=np.int64)
+        self.evidence_scores = np.zeros(shape, dtype=np.float64)
+        self.version = None
+        self.readonly = False
+
+    @classmethod
+    def build(cls, dataset, support_table: FactorSupportTable) -> "RollupCube":
+        cube = cls()
+        for conv in dataset.transcripts:
+            cube.add_transcript(
+                conv, support_table.factors_for_transcript(conv["transcript_id"])
+            )
+        cube.version = support_table.version
+        return cube
+
+    def export_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict]:
+        arrays = {
+            "conversations": self.conversations,
+            "factor_conversations": self.factor_conversations,
+            "evidence_counts": self.evidence_counts,
+            "evidence_scores": self.evidence_scores
+        }
+        metadata = {
+            "codes": {dimension: list(self.codes[dimension].values) for dimension in DIMENSIONS},
+            "version": self.version
+        }
+        return arrays, metadata
+
+    @classmethod
+    def attach(cls, arrays: Dict[str, np.ndarray], metadata: Dict) -> "RollupCube":
+        cube = cls.__new__(cls)
+        cube.codes = {dimension: StringCodes() for dimension in DIMENSIONS}
+        for dimension, values in metadata["codes"].items():
+            for value in values:
+                cube.codes[dimension].encode(value)
+        cube.intent_to_outcome = {
+            intent: outcome
+            for outcome, intent_list in config.OUTCOME_MAPPING.items()
+            for intent in intent_list
+        }
+        cube.conversations = arrays["conversations"]
+        cube.factor_conversations = arrays["factor_conversations"]
+        cube.evidence_counts = arrays["evidence_counts"]
+        cube.evidence_scores = arrays["evidence_scores"]
+        cube.version = metadata["version"]
+        cube.readonly = True
+        return cube
+
+    def _grow(self):
+        target = tuple(len(self.codes[dimension]) for dimension in DIMENSIONS)
+        if target == self.factor_conversations.shape:
+            return
+        pad = [(0, t - s) for t, s in zip(target, self.factor_conversations.shape)]
+        self.conversations = np.pad(self.conversations, pad[:3])
+        self.factor_conversations = np.pad(self.factor_conversations, pad)
+        self.evidence_counts = np.pad(self.evidence_counts, pad)
+        self.evidence_scores = np.pad(self.evidence_scores, pad)
+
+    def _apply(self, conv: Mapping, factors: Dict[str, int], sign: int):
+        if self.readonly:
+            raise RuntimeError("Rollup cube is attached to shared segments and is read-only")
+        cell = (
+            self.codes["domain"].encode(conv["domain"]),
+            self.codes["intent"].encode(conv["intent"]),
+            self.codes["outcome"].encode(
+                self.intent_to_outcome.get(conv["intent"], NO_OUTCOME)
+            )
+        )
+        factor_codes = [self.codes["factor"].encode(f) for f in factors]
+        self._grow()
+
+        num_turns = max(len(conv["conversation"]), 1)
+        self.conversations[cell] += sign
+        for code, evidence_count in zip(factor_codes, factors.values()):
+            self.factor_conversations[cell + (code,)] += sign
+            self.evidence_counts[cell + (code,)] += sign * evidence_count
+            self.evidence_scores[cell + (code,)] += sign * round(evidence_count / num_turns, 2)
+
+    def add_transcript(self, conv: Mapping, factors: Dict[str, int]):
+        self._apply(conv, factors, 1)
+
+    def remove_transcript(self, conv: Mapping, factors: Dict[str, int]):
+        self._apply(conv, factors, -1)
+
+    def _selectors(self, filters: Optional[Filters]) -> List[np.ndarray]:
+        selectors = []
+        for dimension in DIMENSIONS:
+            codes = self.codes[dimension]
+            wanted = (filters or {}).get(dimension)
+            if wanted is None:
+                selectors.append(np.arange(len(codes)))
+                continue
+            if isinstance(wanted, str):
+                wanted = [wanted]
+            selectors.append(np.array(
+                [codes.codes[v] for v in wanted if v in codes.codes], dtype=np.int64
+            ))
+        return selectors
+
+    def rollup(
+        self,
+        by: Sequence[str] = (),
+        filters: Optional[Filters] = None
+    ) -> pd.DataFrame:
+        by = list(by)
+        unknown = set(by) | set(filters or {})
+        unknown -= set(DIMENSIONS)
+        if unknown:
+            raise ValueError(
+                f"Unknown rollup dimensions {sorted(unknown)}; expected {DIMENSIONS}"
+            )
+
+        selectors = self._selectors(filters)
+        grid = np.ix_(*selectors)
+        factor_axes = tuple(a for a, d in enumerate(DIMENSIONS) if d not in by)
+        base_axes = tuple(a for a, d in enumerate(DIMENSIONS[:3]) if d not in by)
+
+        factor_conversations = self.factor_conversations[grid].sum(axis=factor_axes)
+        evidence_counts = self.evidence_counts[grid].sum(axis=factor_axes)
+        evidence_scores = self.evidence_scores[grid].sum(axis=factor_axes)
+        conversations = self.conversations[np.ix_(*selectors[:3])].sum(axis=base_axes)
+        if "factor" in by:
+            conversations = np.broadcast_to(
+                conversations[..., None], factor_conversations.shape
+            )
+
+        kept = [(d, selectors[a]) for a, d in enumerate(DIMENSIONS) if d in by]
+        cells = np.nonzero(factor_conversations > 0) if by else ()
+        columns = {
+            dimension: [self.codes[dimension].values[c] for c in codes[axis_cells]]
+            for (dimension, codes), axis_cells in zip(kept, cells)
+        }
+        factor_conversations = np.atleast_1d(factor_conversations[cells])
+        conversations = np.atleast_1d(conversations[cells])
+
+        frame = pd.DataFrame({
+            **columns,
+            "factor_conversations": factor_conversations,
+            "conversations": conversations,
+            "support_rate": np.round(
+                factor_conversations / np.maximum(conversations, 1), 4
+            ),
+            "evidence_count": np.atleast_1d(evidence_counts[cells]),
+            "avg_evidence_score": np.round(
+                np.atleast_1d(evidence_scores[cells]) / np.maximum(factor_conversations, 1), 3
+            )
+        })
+        return frame.sort_values(
+            by + ["factor_conversations"],
+            ascending=[True] * len(by) + [False]
+        ).reset_index(drop=True)
+
+    def slice(self, **filters) -> pd.DataFrame:
+        return self.rollup(by=["factor"], filters=filters)
+
+    def top_factors(
+        self,
+        by: Sequence[str] = ("domain",),
+        k: int = 5,
+        filters: Optional[Filters] = None
+    ) -> pd.DataFrame:
+        by = [d for d in by if d != "factor"]
+        frame = self.rollup(by=by + ["factor"], filters=filters)
+        if not by:
+            return frame.head(k)
+        return frame.groupby(by, sort=True).head(k).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    from reasoning_engine import CausalReasoningEngine
+
+    engine = CausalReasoningEngine(verbose=False)
+    cube = engine.rollup_cube
+
+    started = time.perf_counter()
+    top = cube.top_factors(by=["domain"], k=3, filters={"outcome": "ESCALATION"})
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    print("=" * 60)
+    print("TOP ESCALATION FACTORS PER DOMAIN")
+    print("=" * 60)
+    print(top.to_string(index=False))
+    print(f"\nQuery time: {elapsed_ms:.2f} ms")
+    print("=" * 60)
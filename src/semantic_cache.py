@@ -0,0 +1,115 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+import numpy as np
+
+import config
+
+
+class SemanticResultCache:
+    def __init__(
+        self,
+        max_size: int = None,
+        threshold: float = None,
+        dimension: int = None
+    ):
+        self.max_size = max_size or config.SEMANTIC_CACHE_SIZE
+        self.threshold = (
+            config.SEMANTIC_CACHE_THRESHOLD if threshold is None else threshold
+        )
+        self.dimension = dimension or config.EMBEDDING_DIMENSION
+
+        self.embeddings = np.zeros(
+            (self.max_size, self.dimension),
+            dtype=np.float32
+        )
+        self.entries: Dict[int, Tuple[Hashable, str, Dict]] = {}
+        self.scope_slots: Dict[Hashable, set] = {}
+        self.lru: "OrderedDict[int, None]" = OrderedDict()
+        self.free_slots = list(range(self.max_size - 1, -1, -1))
+
+        self.version: Optional[Hashable] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def ensure_version(self, version: Hashable):
+        if version == self.version:
+            return
+        if self.version is not None:
+            self.invalidations += 1
+        self.clear()
+        self.version = version
+
+    def clear(self):
+        self.entries.clear()
+        self.scope_slots.clear()
+        self.lru.clear()
+        self.free_slots = list(range(self.max_size - 1, -1, -1))
+
+    def lookup(
+        self,
+        embedding: np.ndarray,
+        scope: Hashable
+    ) -> Optional[Dict]:
+        slots = self.scope_slots.get(scope)
+        if not slots:
+            self.misses += 1
+            return None
+
+        candidate_slots = np.fromiter(slots, dtype=np.int64)
+        similarities = self.embeddings[candidate_slots] @ embedding
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+
+        if not np.isfinite(similarity) or similarity < self.threshold:
+            self.misses += 1
+            return None
+
+        slot = int(candidate_slots[best])
+        self.lru.move_to_end(slot)
+        self.hits += 1
+        _, matched_query, result = self.entries[slot]
+
+        return {
+            "result": result,
+            "matched_query": matched_query,
+            "similarity": round(similarity, 4)
+        }
+
+    def store(
+        self,
+        embedding: np.ndarray,
+        scope: Hashable,
+        query: str,
+        result: Dict
+    ):
+        if not self.free_slots:
+            self._evict()
+
+        slot = self.free_slots.pop()
+        self.embeddings[slot] = embedding
+        self.entries[slot] = (scope, query, result)
+        self.scope_slots.setdefault(scope, set()).add(slot)
+        self.lru[slot] = None
+
+    def _evict(self):
+        slot, _ = self.lru.popitem(last=False)
+        scope, _, _ = self.entries.pop(slot)
+        self.scope_slots[scope].discard(slot)
+        if not self.scope_slots[scope]:
+            del self.scope_slots[scope]
+        self.free_slots.append(slot)
+        self.evictions += 1
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
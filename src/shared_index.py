@@ -0,0 +1,320 @@
+import os
+import uuid
+import pickle
+import shutil
+import tempfile
+import multiprocessing
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+import config
+from data_loader import ConversationDataset
+from encoders import attach_encoder, export_encoder
+from factor_support import FrozenSupportTable
+from reasoning_engine import CausalReasoningEngine
+from retriever import HybridRetriever
+from rollup_cube import RollupCube
+from text_pipeline import TextPipeline
+from transcript_store import CompactTranscriptStore
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+MANIFEST_NAME = "manifest.pkl"
+LEASE_NAME = "lease.lock"
+STAGING_PREFIX = ".staging-"
+TRASH_PREFIX = ".trash-"
+
+
+class FrozenClusterMap:
+    def __init__(self, representatives: np.ndarray, sizes: np.ndarray):
+        self.representatives = representatives
+        self.sizes = sizes
+
+    @classmethod
+    def from_dataset(cls, dataset: ConversationDataset) -> "FrozenClusterMap":
+        count = len(dataset.store)
+        representatives = np.full(count, -1, dtype=np.int64)
+        sizes = np.zeros(count, dtype=np.int32)
+        for index in range(count):
+            representative = dataset.representative(index)
+            if representative is not None:
+                representatives[index] = representative
+                sizes[index] = dataset.cluster_size(index)
+        return cls(representatives, sizes)
+
+    def representative(self, index: int) -> Optional[int]:
+        representative = int(self.representatives[index])
+        return representative if representative >= 0 else None
+
+    def is_representative(self, index: int) -> bool:
+        return self.representative(index) == index
+
+    def cluster_size(self, index: int) -> int:
+        return int(self.sizes[index])
+
+    def add(self, index: int, conversation: Sequence, scope=None) -> int:
+        raise RuntimeError("Cluster map is attached to shared segments and is read-only")
+
+    def remove(self, index: int) -> Optional[int]:
+        raise RuntimeError("Cluster map is attached to shared segments and is read-only")
+
+
+def _segment_version(engine: CausalReasoningEngine) -> str:
+    retriever = engine.retriever
+    return f"{engine.dataset.fingerprint}-{retriever.lexical_generation}-{retriever.num_rows}"
+
+
+def _open_lease(segment_dir: str, shared: bool = True, blocking: bool = True):
+    lease = open(os.path.join(segment_dir, LEASE_NAME), "ab")
+    if fcntl is None:
+        return lease
+    flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+    try:
+        fcntl.flock(lease.fileno(), flags if blocking else flags | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lease.close()
+        return None
+    return lease
+
+
+def _read_manifest(directory: str) -> Dict:
+    with open(os.path.join(directory, MANIFEST_NAME), "rb") as f:
+        return pickle.load(f)
+
+
+def publish_segments(
+    engine: CausalReasoningEngine,
+    directory: Optional[str] = None
+) -> str:
+    if directory is None:
+        directory = config.SHARED_SEGMENT_DIR
+    version = _segment_version(engine)
+    os.makedirs(directory, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=directory)
+    lease = _open_lease(staging_dir)
+
+    try:
+        store = engine.dataset.store
+        store_arrays, store_metadata = store.export_arrays()
+        retriever_arrays, retriever_metadata = engine.retriever.export_arrays()
+        support_arrays, support_metadata = engine.support_table.export_arrays(store)
+        cube_arrays, cube_metadata = engine.rollup_cube.export_arrays()
+        pipeline_arrays, pipeline_metadata = engine.dataset.text_pipeline.export_arrays()
+        encoder_arrays, encoder_metadata = export_encoder(engine.retriever.embedder)
+        speakers = (
+            engine.speaker_loader.get() if engine.speaker_loader is not None else {}
+        )
+        speaker_exports = {
+            speaker: retriever.export_arrays()
+            for speaker, retriever in speakers.items()
+        }
+        clusters = FrozenClusterMap.from_dataset(engine.dataset)
+        groups = {
+            "store": store_arrays,
+            "retriever": retriever_arrays,
+            "clusters": {
+                "representatives": clusters.representatives,
+                "sizes": clusters.sizes
+            },
+            "support": support_arrays,
+            "cube": cube_arrays,
+            "text_pipeline": pipeline_arrays,
+            "encoder": encoder_arrays,
+            **{
+                f"speaker_{speaker}": arrays
+                for speaker, (arrays, _) in speaker_exports.items()
+            }
+        }
+
+        files: Dict[str, Dict[str, str]] = {}
+        for group, arrays in groups.items():
+            files[group] = {}
+            for name, array in arrays.items():
+                filename = f"{group}.{name}.npy"
+                np.save(os.path.join(staging_dir, filename), np.ascontiguousarray(array))
+                files[group][name] = filename
+
+        segment_name = f"{version}-{uuid.uuid4().hex[:8]}"
+        os.rename(staging_dir, os.path.join(directory, segment_name))
+        manifest = {
+            "version": version,
+            "segment_dir": segment_name,
+            "files": files,
+            "store": store_metadata,
+            "retriever": retriever_metadata,
+            "support": support_metadata,
+            "cube": cube_metadata,
+            "text_pipeline": pipeline_metadata,
+            "encoder": encoder_metadata,
+            "speakers": {
+                speaker: metadata
+                for speaker, (_, metadata) in speaker_exports.items()
+            }
+        }
+        manifest_path = os.path.join(directory, MANIFEST_NAME)
+        tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(manifest, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, manifest_path)
+    finally:
+        lease.close()
+
+    collect_segments(directory)
+    return manifest_path
+
+
+def collect_segments(directory: Optional[str] = None) -> List[str]:
+    if directory is None:
+        directory = config.SHARED_SEGMENT_DIR
+    if fcntl is None:
+        return []
+    current = _read_manifest(directory)["segment_dir"]
+    removed = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name == current or not os.path.isdir(path):
+            continue
+        if name.startswith(TRASH_PREFIX):
+            shutil.rmtree(path, ignore_errors=True)
+            continue
+        has_lease = os.path.exists(os.path.join(path, LEASE_NAME))
+        if name.startswith(STAGING_PREFIX) and not has_lease:
+            continue
+        try:
+            lease = _open_lease(path, shared=False, blocking=False) if has_lease else None
+        except FileNotFoundError:
+            continue
+        if has_lease and lease is None:
+            continue
+        try:
+            if name == _read_manifest(directory)["segment_dir"]:
+                continue
+            trash = os.path.join(directory, f"{TRASH_PREFIX}{name}")
+            os.rename(path, trash)
+            shutil.rmtree(trash, ignore_errors=True)
+            removed.append(name)
+        finally:
+            if lease is not None:
+                lease.close()
+    return removed
+
+
+def attach_segments(directory: Optional[str] = None) -> Dict:
+    if directory is None:
+        directory = config.SHARED_SEGMENT_DIR
+    while True:
+        manifest = _read_manifest(directory)
+        segment_dir = os.path.join(directory, manifest["segment_dir"])
+        try:
+            lease = _open_lease(segment_dir)
+        except FileNotFoundError:
+            continue
+        if os.path.exists(os.path.join(segment_dir, LEASE_NAME)):
+            break
+        lease.close()
+
+    arrays = {
+        group: {
+            name: np.load(os.path.join(segment_dir, filename), mmap_mode="r")
+            for name, filename in files.items()
+        }
+        for group, files in manifest["files"].items()
+    }
+    return {"manifest": manifest, "arrays": arrays, "lease": lease}
+
+
+def attach_engine(
+    directory: Optional[str] = None,
+    verbose: bool = False
+) -> CausalReasoningEngine:
+    segments = attach_segments(directory)
+    manifest = segments["manifest"]
+    arrays = segments["arrays"]
+
+    store = CompactTranscriptStore.attach(arrays["store"], manifest["store"])
+    clusters = FrozenClusterMap(
+        arrays["clusters"]["representatives"],
+        arrays["clusters"]["sizes"]
+    )
+    dataset = ConversationDataset(
+        verbose=verbose,
+        store=store,
+        dedup=clusters,
+        text_pipeline=TextPipeline.attach(
+            store, arrays["text_pipeline"], manifest["text_pipeline"]
+        )
+    )
+    embedder = attach_encoder(arrays["encoder"], manifest["encoder"])
+    retriever = HybridRetriever.attach(
+        dataset,
+        arrays["retriever"],
+        manifest["retriever"],
+        embedder=embedder,
+        verbose=verbose
+    )
+    speaker_retrievers = {
+        speaker: HybridRetriever.attach(
+            dataset,
+            arrays[f"speaker_{speaker}"],
+            metadata,
+            embedder=embedder,
+            verbose=verbose
+        )
+        for speaker, metadata in manifest["speakers"].items()
+    }
+    engine = CausalReasoningEngine(
+        verbose=verbose,
+        dataset=dataset,
+        retriever=retriever,
+        support_table=FrozenSupportTable(store, arrays["support"], manifest["support"]),
+        rollup_cube=RollupCube.attach(arrays["cube"], manifest["cube"]),
+        speaker_retrievers=speaker_retrievers
+    )
+    engine.segments = segments
+    return engine
+
+
+_worker_engine: Optional[CausalReasoningEngine] = None
+
+
+def _init_worker(directory: Optional[str]):
+    global _worker_engine
+    _worker_engine = attach_engine(directory)
+
+
+def _answer_in_worker(task: Dict) -> Dict:
+    return _worker_engine.answer_query(**task)
+
+
+def answer_queries_parallel(
+    queries: List[str],
+    outcome: str,
+    top_k: int = 5,
+    processes: Optional[int] = None,
+    directory: Optional[str] = None
+) -> List[Dict]:
+    tasks = [{"query": q, "outcome": outcome, "top_k": top_k} for q in queries]
+    with multiprocessing.Pool(
+        processes=processes,
+        initializer=_init_worker,
+        initargs=(directory,)
+    ) as pool:
+        return pool.map(_answer_in_worker, tasks)
+
+
+if __name__ == "__main__":
+    engine = CausalReasoningEngine()
+    manifest_path = publish_segments(engine)
+
+    print("=" * 60)
+    print("SHARED INDEX SEGMENTS PUBLISHED")
+    print("=" * 60)
+    print(f"Manifest: {manifest_path}")
+    print(f"Transcripts: {len(engine.dataset.transcripts)}")
+    print(f"Indexed rows: {engine.retriever.num_rows}")
+    print("Workers attach with shared_index.attach_engine()")
+    print("=" * 60)
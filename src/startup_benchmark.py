@@ -0,0 +1,94 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List
+
+TARGET_TIME_TO_PROMPT_MS = 300
+
+CHILD_SCRIPT = """
+import sys
+import cli
+session = cli.start_session(background={background})
+print("PROMPT", flush=True)
+if {wait_for_engine}:
+    session["system_loader"].get()
+print("READY", flush=True)
+"""
+
+
+def _measure_once(background: bool, wait_for_engine: bool) -> Dict[str, float]:
+    script = CHILD_SCRIPT.format(
+        background=background,
+        wait_for_engine=wait_for_engine
+    )
+    started_at = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True
+    )
+
+    timings = {}
+    for line in process.stdout:
+        marker = line.strip()
+        if marker == "PROMPT":
+            timings["time_to_prompt_ms"] = (time.perf_counter() - started_at) * 1000
+        elif marker == "READY":
+            timings["time_to_ready_ms"] = (time.perf_counter() - started_at) * 1000
+    process.wait()
+
+    if process.returncode != 0 or "time_to_prompt_ms" not in timings:
+        raise RuntimeError(
+            f"Startup benchmark child exited with code {process.returncode}"
+        )
+    return timings
+
+
+def run_benchmark(runs: int = 5, wait_for_engine: bool = False) -> Dict[str, Dict]:
+    report = {}
+    for mode, background in [("background", True), ("synchronous", False)]:
+        samples: List[Dict[str, float]] = [
+            _measure_once(background, wait_for_engine) for _ in range(runs)
+        ]
+        prompt_times = [s["time_to_prompt_ms"] for s in samples]
+        mode_report = {
+            "time_to_prompt_min_ms": round(min(prompt_times), 1),
+            "time_to_prompt_median_ms": round(statistics.median(prompt_times), 1)
+        }
+        if wait_for_engine:
+            ready_times = [s["time_to_ready_ms"] for s in samples]
+            mode_report["time_to_ready_median_ms"] = round(
+                statistics.median(ready_times), 1
+            )
+        report[mode] = mode_report
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure CLI time-to-prompt")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--wait-for-engine",
+        action="store_true",
+        help="also measure time until the engine finishes loading"
+    )
+    args = parser.parse_args()
+
+    report = run_benchmark(runs=args.runs, wait_for_engine=args.wait_for_engine)
+
+    print("=" * 60)
+    print("CLI STARTUP BENCHMARK")
+    print("=" * 60)
+    for mode, stats in report.items():
+        print(f"\n{mode}:")
+        for name, value in stats.items():
+            print(f"  {name}: {value}")
+    median = report["background"]["time_to_prompt_median_ms"]
+    status = "PASS" if median <= TARGET_TIME_TO_PROMPT_MS else "FAIL"
+    print(f"\nTarget time-to-prompt: {TARGET_TIME_TO_PROMPT_MS} ms → {status}")
+    print("=" * 60)
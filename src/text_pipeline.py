@@ -0,0 +1,273 @@
+import os
+import re
+import hashlib
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+import config
+from result_cache import LRUCache
+from transcript_store import CompactTranscriptStore, StringCodes
+
+PIPELINE_VERSION = 1
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+STOP_WORDS = frozenset({
+    "a", "about", "above", "across", "after", "afterwards", "again", "against", "all",
+    "almost", "alone", "along", "already", "also", "although", "always", "am", "among",
+    "amongst", "amoungst", "amount", "an", "and", "another", "any", "anyhow", "anyone",
+    "anything", "anyway", "anywhere", "are", "around", "as", "at", "back", "be",
+    "became", "because", "become", "becomes", "becoming", "been", "before",
+    "beforehand", "behind", "being", "below", "beside", "besides", "between", "beyond",
+    "bill", "both", "bottom", "but", "by", "call", "can", "cannot", "cant", "co", "con",
+    "could", "couldnt", "cry", "de", "describe", "detail", "do", "done", "down", "due",
+    "during", "each", "eg", "eight", "either", "eleven", "else", "elsewhere", "empty",
+    "enough", "etc", "even", "ever", "every", "everyone", "everything", "everywhere",
+    "except", "few", "fifteen", "fifty", "fill", "find", "fire", "first", "five", "for",
+    "former", "formerly", "forty", "found", "four", "from", "front", "full", "further",
+    "get", "give", "go", "had", "has", "hasnt", "have", "he", "hence", "her", "here",
+    "hereafter", "hereby", "herein", "hereupon", "hers", "herself", "him", "himself",
+    "his", "how", "however", "hundred", "i", "ie", "if", "in", "inc", "indeed",
+    "interest", "into", "is", "it", "its", "itself", "keep", "last", "latter",
+    "latterly", "least", "less", "ltd", "made", "many", "may", "me", "meanwhile",
+    "might", "mill", "mine", "more", "moreover", "most", "mostly", "move", "much",
+    "must", "my", "myself", "name", "namely", "neither", "never", "nevertheless",
+    "next", "nine", "no", "nobody", "none", "noone", "nor", "not", "nothing", "now",
+    "nowhere", "of", "off", "often", "on", "once", "one", "only", "onto", "or", "other",
+    "others", "otherwise", "our", "ours", "ourselves", "out", "over", "own", "part",
+    "per", "perhaps", "please", "put", "rather", "re", "same", "see", "seem", "seemed",
+    "seeming", "seems", "serious", "several", "she", "should", "show", "side", "since",
+    "sincere", "six", "sixty", "so", "some", "somehow", "someone", "something",
+    "sometime", "sometimes", "somewhere", "still", "such", "system", "take", "ten",
+    "than", "that", "the", "their", "them", "themselves", "then", "thence", "there",
+    "thereafter", "thereby", "therefore", "therein", "thereupon", "these", "they",
+    "thick", "thin", "third", "this", "those", "though", "three", "through",
+    "throughout", "thru", "thus", "to", "together", "too", "top", "toward", "towards",
+    "twelve", "twenty", "two", "un", "under", "until", "up", "upon", "us", "very",
+    "via", "was", "we", "well", "were", "what", "whatever", "when", "whence",
+    "whenever", "where", "whereafter", "whereas", "whereby", "wherein", "whereupon",
+    "wherever", "whether", "which", "while", "whither", "who", "whoever", "whole",
+    "whom", "whose", "why", "will", "with", "within", "without", "would", "yet", "you",
+    "your", "yours", "yourself", "yourselves"
+})
+
+
+def normalize_text(text: str) -> str:
+    normalized = text.lower()
+    if len(normalized) == len(text):
+        return normalized
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+def tokenize(normalized: str) -> List[str]:
+    return TOKEN_PATTERN.findall(normalized)
+
+
+def speaker_role(speaker: str) -> str:
+    return speaker.strip().lower()
+
+
+def lexical_analyzer(document) -> List[str]:
+    tokens = document if isinstance(document, list) else tokenize(normalize_text(document))
+    words = [t for t in tokens if t not in STOP_WORDS]
+    return words + [" ".join(pair) for pair in zip(words, words[1:])]
+
+
+class TextPipeline:
+    ARRAYS = {
+        "normalized": "uint8",
+        "normalized_offsets": "uint64",
+        "token_ids": "uint32",
+        "token_offsets": "uint64",
+        "header_ids": "uint32",
+        "header_offsets": "uint64"
+    }
+
+    def __init__(self, store: CompactTranscriptStore):
+        self.store = store
+        self.normalized = bytearray()
+        self.normalized_offsets = array('Q', [0])
+        self.token_ids = array('I')
+        self.token_offsets = array('Q', [0])
+        self.header_ids = array('I')
+        self.header_offsets = array('Q', [0])
+        self.vocabulary = StringCodes()
+        self.num_transcripts = 0
+        self.readonly = False
+        self._label_tokens: Dict[str, List[str]] = {}
+        self.turn_cache = LRUCache(config.NORMALIZED_TURN_CACHE_SIZE)
+        self._lock = threading.Lock()
+        self._turn_lock = threading.Lock()
+
+    @classmethod
+    def load_or_build(
+        cls,
+        store: CompactTranscriptStore,
+        cache_path: Optional[str] = None
+    ) -> "TextPipeline":
+        if cache_path is None:
+            cache_path = os.path.join(config.CACHE_DIR, "text_pipeline.npz")
+        key = cls.store_key(store)
+        pipeline = cls(store)
+        if os.path.exists(cache_path):
+            try:
+                if pipeline._load(cache_path, key):
+                    return pipeline
+            except (OSError, ValueError, KeyError):
+                pipeline = cls(store)
+        pipeline.sync()
+        pipeline.save(cache_path, key)
+        return pipeline
+
+    @staticmethod
+    def store_key(store: CompactTranscriptStore) -> str:
+        digest = hashlib.sha1(f"{PIPELINE_VERSION}:{store.fingerprint()}".encode("utf-8"))
+        for transcript_id in store.transcript_ids:
+            digest.update(transcript_id.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()[:16]
+
+    def export_arrays(self) -> Tuple[Dict, Dict]:
+        import numpy as np
+
+        self.sync()
+        with self._lock:
+            arrays = {
+                name: np.frombuffer(getattr(self, name), dtype=dtype)
+                for name, dtype in self.ARRAYS.items()
+            }
+            metadata = {
+                "vocabulary": list(self.vocabulary.values),
+                "num_transcripts": self.num_transcripts
+            }
+        return arrays, metadata
+
+    @classmethod
+    def attach(
+        cls,
+        store: CompactTranscriptStore,
+        arrays: Dict,
+        metadata: Dict
+    ) -> "TextPipeline":
+        pipeline = cls(store)
+        for name in cls.ARRAYS:
+            setattr(pipeline, name, arrays[name])
+        for value in metadata["vocabulary"]:
+            pipeline.vocabulary.encode(value)
+        pipeline.num_transcripts = metadata["num_transcripts"]
+        pipeline.readonly = True
+        return pipeline
+
+    def save(self, cache_path: str, key: str):
+        import numpy as np
+
+        arrays, metadata = self.export_arrays()
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        try:
+            np.savez(
+                tmp_path,
+                key=np.array(key),
+                vocabulary=np.array(metadata["vocabulary"], dtype=str),
+                num_transcripts=np.array(metadata["num_transcripts"]),
+                **arrays
+            )
+            os.replace(tmp_path, cache_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _load(self, cache_path: str, key: str) -> bool:
+        import numpy as np
+
+        with np.load(cache_path, allow_pickle=False) as cached:
+            if str(cached["key"]) != key:
+                return False
+            self.normalized = bytearray(cached["normalized"].tobytes())
+            for name in ("normalized_offsets", "token_offsets", "header_offsets"):
+                setattr(self, name, array('Q', cached[name].astype(np.uint64).tobytes()))
+            for name in ("token_ids", "header_ids"):
+                values = array('I')
+                values.frombytes(cached[name].astype(np.uint32).tobytes())
+                setattr(self, name, values)
+            for value in cached["vocabulary"].tolist():
+                self.vocabulary.encode(value)
+            self.num_transcripts = int(cached["num_transcripts"])
+        return True
+
+    def sync(self):
+        if self.num_transcripts == len(self.store):
+            return
+        if self.readonly:
+            raise RuntimeError("Text pipeline is attached to shared segments and is read-only")
+        with self._lock:
+            for index in range(self.num_transcripts, len(self.store)):
+                self._process(index)
+                self.num_transcripts = index + 1
+
+    def _encode_tokens(self, text: str) -> List[int]:
+        return [self.vocabulary.encode(token) for token in tokenize(text)]
+
+    def _process(self, index: int):
+        store = self.store
+        start = store.transcript_turn_start[index]
+        stop = store.transcript_turn_start[index + 1]
+        for turn in range(start, stop):
+            text = normalize_text(store.turn_text(turn))
+            self.normalized += text.encode("utf-8")
+            self.normalized_offsets.append(len(self.normalized))
+            self.token_ids.extend(self._encode_tokens(text))
+            self.token_offsets.append(len(self.token_ids))
+
+        header = " ".join([
+            f"Domain: {store.domains.values[store.domain_codes[index]]}",
+            f"Intent: {store.intents.values[store.intent_codes[index]]}",
+            f"Reason: {store.reason_text(index)}"
+        ])
+        self.header_ids.extend(self._encode_tokens(normalize_text(header)))
+        self.header_offsets.append(len(self.header_ids))
+
+    def _turn_range(self, index: int) -> range:
+        if index >= self.num_transcripts:
+            self.sync()
+        store = self.store
+        return range(store.transcript_turn_start[index], store.transcript_turn_start[index + 1])
+
+    def normalized_turns(self, index: int) -> Tuple[str, ...]:
+        with self._turn_lock:
+            turns = self.turn_cache.get(index)
+        if turns is not None:
+            return turns
+        offsets = self.normalized_offsets
+        turns = tuple(
+            str(self.normalized[offsets[turn]:offsets[turn + 1]], "utf-8")
+            for turn in self._turn_range(index)
+        )
+        with self._turn_lock:
+            self.turn_cache.put(index, turns)
+        return turns
+
+    def _tokens(self, ids: array, offsets: array, position: int) -> List[str]:
+        values = self.vocabulary.values
+        return [values[code] for code in ids[offsets[position]:offsets[position + 1]]]
+
+    def _speaker_label_tokens(self, label: str) -> List[str]:
+        tokens = self._label_tokens.get(label)
+        if tokens is None:
+            tokens = tokenize(normalize_text(label))
+            self._label_tokens[label] = tokens
+        return tokens
+
+    def document_tokens(self, index: int, speaker: Optional[str] = None) -> List[str]:
+        turns = self._turn_range(index)
+        store = self.store
+        tokens = (
+            [] if speaker is not None
+            else self._tokens(self.header_ids, self.header_offsets, index)
+        )
+        for turn in turns:
+            label = store.speakers.values[store.turn_speakers[turn]]
+            if speaker is None:
+                tokens.extend(self._speaker_label_tokens(label))
+            elif speaker_role(label) != speaker:
+                continue
+            tokens.extend(self._tokens(self.token_ids, self.token_offsets, turn))
+        return tokens
@@ -0,0 +1,388 @@
+import hashlib
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+CORE_FIELDS = ("transcript_id", "domain", "intent", "reason_for_call", "conversation")
+TURN_FIELDS = ("speaker", "text")
+ARRAY_FIELDS = {
+    "text": np.uint8,
+    "turn_offsets": np.uint64,
+    "turn_speakers": np.uint16,
+    "transcript_turn_start": np.uint64,
+    "reasons": np.uint8,
+    "reason_offsets": np.uint64,
+    "domain_codes": np.uint32,
+    "intent_codes": np.uint32,
+    "num_turns": np.uint32,
+    "alive": np.uint8
+}
+
+
+class StringCodes:
+    __slots__ = ("values", "codes")
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class TurnView(Mapping):
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "CompactTranscriptStore", index: int):
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, key: str):
+        if key == "text":
+            return self._store.turn_text(self._index)
+        if key == "speaker":
+            return self._store.speakers.values[self._store.turn_speakers[self._index]]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(TURN_FIELDS)
+
+    def __len__(self) -> int:
+        return len(TURN_FIELDS)
+
+    def __repr__(self) -> str:
+        return f"TurnView({dict(self)!r})"
+
+
+class ConversationTurns(Sequence):
+    __slots__ = ("_store", "_start", "_stop")
+
+    def __init__(self, store: "CompactTranscriptStore", start: int, stop: int):
+        self._store = store
+        self._start = start
+        self._stop = stop
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [
+                TurnView(self._store, self._start + i)
+                for i in range(*index.indices(len(self)))
+            ]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("turn index out of range")
+        return TurnView(self._store, self._start + index)
+
+    def __iter__(self) -> Iterator[TurnView]:
+        for i in range(self._start, self._stop):
+            yield TurnView(self._store, i)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+
+class TranscriptView(Mapping):
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "CompactTranscriptStore", index: int):
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, key: str):
+        store = self._store
+        i = self._index
+        if key == "transcript_id":
+            return store.transcript_ids[i]
+        if key == "domain":
+            return store.domains.values[store.domain_codes[i]]
+        if key == "intent":
+            return store.intents.values[store.intent_codes[i]]
+        if key == "reason_for_call":
+            return store.reason_text(i)
+        if key == "conversation":
+            return ConversationTurns(
+                store,
+                store.transcript_turn_start[i],
+                store.transcript_turn_start[i + 1]
+            )
+        extra = store.extra_fields.get(i)
+        if extra is not None and key in extra:
+            return extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from CORE_FIELDS
+        yield from self._store.extra_fields.get(self._index, ())
+
+    def __len__(self) -> int:
+        return len(CORE_FIELDS) + len(self._store.extra_fields.get(self._index, ()))
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    def to_dict(self) -> Dict:
+        data = dict(self)
+        data["conversation"] = [dict(turn) for turn in self["conversation"]]
+        return data
+
+    def __repr__(self) -> str:
+        return f"TranscriptView({self['transcript_id']!r})"
+
+
+class TranscriptSequence(Sequence):
+    __slots__ = ("_store",)
+
+    def __init__(self, store: "CompactTranscriptStore"):
+        self._store = store
+
+    def __len__(self) -> int:
+        return self._store.live_count
+
+    def __getitem__(self, index):
+        live = self._store.live_indices()
+        if isinstance(index, slice):
+            return [TranscriptView(self._store, i) for i in live[index]]
+        return TranscriptView(self._store, live[index])
+
+    def __iter__(self) -> Iterator[TranscriptView]:
+        store = self._store
+        for i in range(len(store.transcript_ids)):
+            if store.alive[i]:
+                yield TranscriptView(store, i)
+
+
+class TranscriptIdMap(Mapping):
+    __slots__ = ("_store",)
+
+    def __init__(self, store: "CompactTranscriptStore"):
+        self._store = store
+
+    def __getitem__(self, transcript_id: str) -> TranscriptView:
+        return TranscriptView(self._store, self._store.id_to_index[transcript_id])
+
+    def __contains__(self, transcript_id) -> bool:
+        return transcript_id in self._store.id_to_index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store.id_to_index)
+
+    def __len__(self) -> int:
+        return len(self._store.id_to_index)
+
+
+class CompactTranscriptStore:
+    def __init__(self):
+        self.text = bytearray()
+        self.turn_offsets = array('Q', [0])
+        self.turn_speakers = array('H')
+        self.transcript_turn_start = array('Q', [0])
+        self.reasons = bytearray()
+        self.reason_offsets = array('Q', [0])
+
+        self.transcript_ids: List[str] = []
+        self.id_to_index: Dict[str, int] = {}
+        self.domain_codes = array('I')
+        self.intent_codes = array('I')
+        self.extra_fields: Dict[int, Dict] = {}
+
+        self.speakers = StringCodes()
+        self.domains = StringCodes()
+        self.intents = StringCodes()
+
+        self.num_turns = array('I')
+        self.total_turns = 0
+        self._fingerprint_acc = 0
+
+        self.alive = bytearray()
+        self.live_count = 0
+        self._live_indices = range(0)
+        self.readonly = False
+
+    def __len__(self) -> int:
+        return len(self.transcript_ids)
+
+    def live_indices(self):
+        if self._live_indices is None:
+            self._live_indices = [
+                i for i in range(len(self.transcript_ids)) if self.alive[i]
+            ]
+        return self._live_indices
+
+    def _check_writable(self):
+        if self.readonly:
+            raise RuntimeError(
+                "Transcript store is attached to shared segments and is read-only; "
+                "apply updates in the publishing process and republish"
+            )
+
+    def add(self, transcript: Dict) -> int:
+        self._check_writable()
+        index = len(self.transcript_ids)
+        transcript_id = transcript["transcript_id"]
+
+        self.transcript_ids.append(transcript_id)
+        self.id_to_index[transcript_id] = index
+        self.domain_codes.append(self.domains.encode(transcript["domain"]))
+        self.intent_codes.append(self.intents.encode(transcript["intent"]))
+
+        self.reasons += transcript.get("reason_for_call", "").encode("utf-8")
+        self.reason_offsets.append(len(self.reasons))
+
+        turns = transcript["conversation"]
+        for turn in turns:
+            self.turn_speakers.append(self.speakers.encode(turn["speaker"]))
+            self.text += turn["text"].encode("utf-8")
+            self.turn_offsets.append(len(self.text))
+        self.transcript_turn_start.append(len(self.turn_speakers))
+
+        extra = {k: v for k, v in transcript.items() if k not in CORE_FIELDS}
+        if extra:
+            self.extra_fields[index] = extra
+
+        self.num_turns.append(len(turns))
+        self.total_turns += len(turns)
+        self._fingerprint_acc ^= self._transcript_hash(transcript)
+
+        self.alive.append(1)
+        self.live_count += 1
+        if isinstance(self._live_indices, range):
+            self._live_indices = range(len(self.transcript_ids))
+        else:
+            self._live_indices = None
+        return index
+
+    def remove(self, transcript_id: str) -> Optional[int]:
+        self._check_writable()
+        index = self.id_to_index.pop(transcript_id, None)
+        if index is None:
+            return None
+
+        self._fingerprint_acc ^= self._transcript_hash(TranscriptView(self, index))
+        self.alive[index] = 0
+        self.live_count -= 1
+        self.total_turns -= self.num_turns[index]
+        self.extra_fields.pop(index, None)
+        self._live_indices = None
+        return index
+
+    def _transcript_hash(self, transcript) -> int:
+        digest = hashlib.sha1()
+        digest.update(transcript["transcript_id"].encode("utf-8"))
+        digest.update(transcript["intent"].encode("utf-8"))
+        for turn in transcript["conversation"]:
+            digest.update(turn["speaker"].encode("utf-8"))
+            digest.update(turn["text"].encode("utf-8"))
+        return int.from_bytes(digest.digest()[:8], "big")
+
+    def fingerprint(self) -> str:
+        payload = f"{len(self)}:{self._fingerprint_acc:016x}".encode("utf-8")
+        return hashlib.sha1(payload).hexdigest()[:16]
+
+    def turn_text(self, turn_index: int) -> str:
+        start = self.turn_offsets[turn_index]
+        end = self.turn_offsets[turn_index + 1]
+        return str(self.text[start:end], "utf-8")
+
+    def reason_text(self, index: int) -> str:
+        start = self.reason_offsets[index]
+        end = self.reason_offsets[index + 1]
+        return str(self.reasons[start:end], "utf-8")
+
+    def is_alive(self, index: int) -> bool:
+        return bool(self.alive[index])
+
+    def get(self, transcript_id: str) -> Optional[TranscriptView]:
+        index = self.id_to_index.get(transcript_id)
+        if index is None:
+            return None
+        return TranscriptView(self, index)
+
+    def statistics(self) -> Dict:
+        if not self.live_count:
+            return {"min_turns": 0, "max_turns": 0, "avg_turns": 0.0}
+        if self.live_count == len(self.num_turns):
+            lengths = self.num_turns
+        else:
+            lengths = [self.num_turns[i] for i in self.live_indices()]
+        return {
+            "min_turns": min(lengths),
+            "max_turns": max(lengths),
+            "avg_turns": self.total_turns / self.live_count
+        }
+
+    def memory_bytes(self) -> int:
+        arrays = (
+            self.turn_offsets, self.turn_speakers, self.transcript_turn_start,
+            self.reason_offsets, self.domain_codes, self.intent_codes, self.num_turns
+        )
+        return (
+            len(self.text)
+            + len(self.reasons)
+            + sum(a.itemsize * len(a) for a in arrays)
+        )
+
+    def export_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict]:
+        arrays = {
+            name: np.frombuffer(getattr(self, name), dtype=dtype)
+            for name, dtype in ARRAY_FIELDS.items()
+        }
+        metadata = {
+            "transcript_ids": self.transcript_ids,
+            "speakers": self.speakers.values,
+            "domains": self.domains.values,
+            "intents": self.intents.values,
+            "extra_fields": self.extra_fields,
+            "total_turns": self.total_turns,
+            "live_count": self.live_count,
+            "fingerprint_acc": self._fingerprint_acc
+        }
+        return arrays, metadata
+
+    @classmethod
+    def attach(cls, arrays: Dict[str, np.ndarray], metadata: Dict) -> "CompactTranscriptStore":
+        store = cls.__new__(cls)
+        for name in ARRAY_FIELDS:
+            setattr(store, name, arrays[name])
+
+        store.transcript_ids = metadata["transcript_ids"]
+        store.id_to_index = {
+            tid: i for i, tid in enumerate(store.transcript_ids) if store.alive[i]
+        }
+        store.extra_fields = metadata["extra_fields"]
+        store.speakers = StringCodes()
+        store.domains = StringCodes()
+        store.intents = StringCodes()
+        for codes, values in (
+            (store.speakers, metadata["speakers"]),
+            (store.domains, metadata["domains"]),
+            (store.intents, metadata["intents"])
+        ):
+            for value in values:
+                codes.encode(value)
+
+        store.total_turns = metadata["total_turns"]
+        store.live_count = metadata["live_count"]
+        store._fingerprint_acc = metadata["fingerprint_acc"]
+        store._live_indices = (
+            range(len(store.transcript_ids))
+            if store.live_count == len(store.transcript_ids) else None
+        )
+        store.readonly = True
+        return store